@@ -2,6 +2,7 @@
 """
 Test script for verification and no-repetition fixes.
 """
+import asyncio
 import sys
 sys.path.insert(0, 'src')
 
@@ -32,7 +33,7 @@ def test_conversation_flow():
     ]
     
     # First invocation to get greeting
-    result = graph.invoke(state)
+    result = asyncio.run(graph.ainvoke(state))
     state = result
     print(f"\nInitial greeting: {state['messages'][0]['content'][:100]}...")
     
@@ -44,7 +45,7 @@ def test_conversation_flow():
         state["messages"].append({"role": "user", "content": user_msg})
         
         # Process
-        result = graph.invoke(state)
+        result = asyncio.run(graph.ainvoke(state))
         state = result
         
         # Show assistant response
@@ -68,7 +69,7 @@ def test_conversation_flow():
     # Test verification confirmation
     print("\n--- Verification: User confirms ---")
     state["messages"].append({"role": "user", "content": "yes"})
-    state = graph.invoke(state)
+    state = asyncio.run(graph.ainvoke(state))
     
     assistant_msgs = [m for m in state["messages"] if m["role"] == "assistant"]
     if assistant_msgs:
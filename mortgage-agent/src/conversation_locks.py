@@ -0,0 +1,34 @@
+"""
+================================================================================
+CONVERSATION_LOCKS.PY - ONE TURN AT A TIME PER CONVERSATION
+================================================================================
+
+The chat APIs run each turn in a worker thread, and the turn mutates the
+conversation's stored history in place. Requests for the same conversation
+therefore take turns; different conversations still run concurrently.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+# conversation_id -> [lock, requests holding or waiting on it]. An entry is
+# dropped when its last request finishes, so this does not grow with the
+# number of conversations. Only touched from the event loop thread.
+_conversation_locks: Dict[str, List[Any]] = {}
+
+
+@asynccontextmanager
+async def conversation_lock(conversation_id: str) -> AsyncIterator[None]:
+    """Hold the conversation's lock for the duration of one turn."""
+    entry = _conversation_locks.get(conversation_id)
+    if entry is None:
+        entry = _conversation_locks[conversation_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _conversation_locks[conversation_id]
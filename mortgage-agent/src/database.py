@@ -7,6 +7,7 @@ import json
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+from cachetools import TTLCache
 from sqlalchemy import create_engine, Column, String, Text, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -174,9 +175,13 @@ async def cleanup_old_conversations(max_age_hours: int = 24):
         await session.commit()
         return result.rowcount
 
-# In-memory fallback for backwards compatibility
-_memory_conversations: Dict[str, List[Dict[str, str]]] = {}
-_memory_entities: Dict[str, Dict[str, Any]] = {}
+# In-memory fallback for backwards compatibility. Bounded like the API's own
+# store: entries expire CONVERSATION_TTL_SECONDS after their last save and the
+# oldest are evicted past CONVERSATION_MAX_COUNT conversations.
+_MEMORY_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+_MEMORY_MAX_COUNT = int(os.getenv("CONVERSATION_MAX_COUNT", "10000"))
+_memory_conversations: "TTLCache[str, List[Dict[str, str]]]" = TTLCache(maxsize=_MEMORY_MAX_COUNT, ttl=_MEMORY_TTL_SECONDS)
+_memory_entities: "TTLCache[str, Dict[str, Any]]" = TTLCache(maxsize=_MEMORY_MAX_COUNT, ttl=_MEMORY_TTL_SECONDS)
 
 async def get_or_create_conversation(conversation_id: str) -> List[Dict[str, str]]:
     """
@@ -191,8 +196,10 @@ async def get_or_create_conversation(conversation_id: str) -> List[Dict[str, str
     except Exception as e:
         print(f"Database error in get_conversation: {e}")
         # Fall back to memory
-        if conversation_id in _memory_conversations:
-            return _memory_conversations[conversation_id]
+        # One lookup: the entry can expire between a membership test and the read
+        messages = _memory_conversations.get(conversation_id)
+        if messages is not None:
+            return messages
     
     # Return empty conversation if not found anywhere
     return []
@@ -222,8 +229,8 @@ async def get_or_create_conversation_with_entities(conversation_id: str) -> tupl
     except Exception as e:
         print(f"Database error in get_conversation_with_entities: {e}")
         # Fall back to memory
-        if conversation_id in _memory_conversations:
-            messages = _memory_conversations[conversation_id]
+        messages = _memory_conversations.get(conversation_id)
+        if messages is not None:
             entities = _memory_entities.get(conversation_id, {})
             return messages, entities
     
@@ -24,13 +24,16 @@ KEY CONCEPTS:
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
+import asyncio
+import json
 import uuid
 import os
 from .state import GraphState
 from .graph import create_mortgage_graph
+from .nodes import record_user_message, response_token_sink
 
 # Initialize the web server
 app = FastAPI(title="Mortgage Pre-Approval Chatbot", version="1.0.0")
@@ -122,7 +125,9 @@ def create_initial_state() -> GraphState:
         "has_reserves": None,
         
         # Conversation tracking
-        "messages": [],  # Full chat history
+        "messages": [],  # Recent chat history (bounded)
+        "_user_text_concat": "",  # All user text, for pattern extraction
+        "_last_user_content": None,  # Latest user message, for routing
         "current_question": 1,  # Which question (1-8) we're currently on
         
         # Attempt tracking (prevents infinite loops)
@@ -211,7 +216,7 @@ async def chat_endpoint(request: ChatRequest):
         # -------------------------
         # STEP 3: Add User Message
         # -------------------------
-        state["messages"].append({"role": "user", "content": request.message})
+        record_user_message(state, request.message)
         
         # -------------------------
         # STEP 4: Process with Graph
@@ -223,7 +228,7 @@ async def chat_endpoint(request: ChatRequest):
         # - Generate the bot's response
         # - Update current_question if moving forward
         graph = create_mortgage_graph()
-        result = graph.invoke(state)
+        result = await graph.ainvoke(state)
         
         # Log state after processing (see what changed)
         print(f"\nState AFTER processing:")
@@ -281,6 +286,65 @@ async def chat_endpoint(request: ChatRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    STREAMING VARIANT OF /chat
+    
+    Same pipeline as /chat, but the bot's reply is streamed while the LLM
+    generates it, so the user sees the first words after the model's
+    time-to-first-token instead of after the full completion.
+    
+    The response body is newline-delimited JSON:
+    - {"type": "token", "text": "..."}  - reply text fragments (zero or more)
+    - {"type": "done", ...}             - the ChatResponse fields (always last)
+    - {"type": "error", "detail": "..."} - instead of "done" if processing failed
+    
+    Replies that don't come from the LLM (greeting, verification summary,
+    final decision) arrive only in the "done" event.
+    """
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    if conversation_id not in conversations:
+        conversations[conversation_id] = create_initial_state()
+    
+    state = conversations[conversation_id]
+    record_user_message(state, request.message)
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def run_graph() -> GraphState:
+        # The sink is read by generate_conversational_response inside this task
+        token = response_token_sink.set(queue.put_nowait)
+        try:
+            return await create_mortgage_graph().ainvoke(state)
+        finally:
+            response_token_sink.reset(token)
+            queue.put_nowait(None)
+    
+    async def event_stream():
+        task = asyncio.create_task(run_graph())
+        while (text := await queue.get()) is not None:
+            yield json.dumps({"type": "token", "text": text}) + "\n"
+        
+        try:
+            result = await task
+        except Exception as e:
+            print(f"ERROR in chat_stream_endpoint: {str(e)}")
+            yield json.dumps({"type": "error", "detail": f"Error processing request: {str(e)}"}) + "\n"
+            return
+        
+        conversations[conversation_id] = result
+        assistant_messages = [msg for msg in result["messages"] if msg["role"] == "assistant"]
+        done = ChatResponse(
+            response=assistant_messages[-1]["content"] if assistant_messages else "",
+            conversation_id=conversation_id,
+            complete=result.get("conversation_complete", False),
+            decision=result.get("final_decision")
+        )
+        yield json.dumps({"type": "done", **done.model_dump()}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 # ============================================================================
 # DEBUGGING AND UTILITY ENDPOINTS
 # ============================================================================
@@ -341,6 +405,7 @@ async def serve_index():
             "version": "1.0.0",
             "endpoints": {
                 "POST /chat": "Main chat endpoint",
+                "POST /chat/stream": "Chat endpoint streaming the reply as NDJSON",
                 "GET /health": "Health check",
                 "GET /conversations/{id}": "Get conversation state",
                 "DELETE /conversations/{id}": "Delete conversation"
@@ -143,7 +143,7 @@ def start_node(state: GraphState) -> GraphState:
 # MAIN CONVERSATION PROCESSOR
 # ============================================================================
 
-def process_conversation_step(state: GraphState) -> GraphState:
+async def process_conversation_step(state: GraphState) -> GraphState:
     """
     ============================================================================
     THE HEART OF THE SYSTEM - MAIN CONVERSATION ORCHESTRATOR
@@ -169,7 +169,7 @@ def process_conversation_step(state: GraphState) -> GraphState:
     Step 3: AI RESPONSE GENERATION
        - Call generate_conversational_response() in nodes.py
        - LLM analyzes user message and generates appropriate response
-       - Returns: {response: str, extract: str, advance: bool}
+       - Returns: {response: str, extract: dict, advance: bool}
     
     Step 4: FALLBACK EXTRACTION (Safety Net)
        - If AI didn't extract data, try regex patterns
@@ -287,7 +287,7 @@ def process_conversation_step(state: GraphState) -> GraphState:
         if state.get("correction_mode"):
             print(">>> Processing correction from user")
             # Extract the correction using the normal extraction logic
-            extract_info_node(state)
+            await extract_info_node(state)
             
             # Reset correction mode and return to verification
             state["correction_mode"] = False
@@ -339,9 +339,9 @@ def process_conversation_step(state: GraphState) -> GraphState:
         # ---------------------------------------------------------------------
         # Use the unified conversational response system (LLM-based)
         # This calls OpenAI to analyze user message and generate response
-        # Returns: {response: str, extract: str, advance: bool}
+        # Returns: {response: str, extract: dict, advance: bool}
         from .nodes import generate_conversational_response
-        conversation_result = generate_conversational_response(state)
+        conversation_result = await generate_conversational_response(state)
         
         # ---------------------------------------------------------------------
         # STEP 4: FALLBACK EXTRACTION (Safety Net)
@@ -350,7 +350,7 @@ def process_conversation_step(state: GraphState) -> GraphState:
         # This is critical because LLM extraction can fail on simple answers
         # Example: User says "$50k" - LLM might not extract it properly
         print(f">>> FALLBACK CHECK: extract={conversation_result.get('extract')}, has_user_msg={bool(user_messages)}")
-        if (not conversation_result.get("extract") or conversation_result["extract"] == "none") and user_messages:
+        if not conversation_result.get("extract") and user_messages:
             import re
             user_text = last_user_message.lower()
             print(f">>> Running fallback extraction on: '{user_text[:100]}'")
@@ -543,62 +543,16 @@ def process_conversation_step(state: GraphState) -> GraphState:
         })
         
         # ---------------------------------------------------------------------
-        # STEP 4B: PARSE LLM EXTRACTION (if any)
+        # STEP 4B: APPLY LLM EXTRACTION (if any)
         # ---------------------------------------------------------------------
-        # If LLM provided extraction instructions, parse them
-        # Format: "field1:value1,field2:value2"
-        # Example: "down_payment:50000,property_city:Miami"
-        if conversation_result.get("extract") and conversation_result["extract"] != "none":
+        # The emit_turn tool call returns typed fields (amounts as whole-dollar
+        # ints, booleans as bools, loan_purpose/current_location as enum values)
+        # Example: {"down_payment": 50000, "property_city": "Miami"}
+        if conversation_result.get("extract"):
             print(f">>> LLM suggested extraction: {conversation_result['extract']}")
-            # Parse the extraction string and update state directly
-            extract_str = conversation_result["extract"]
-            if ":" in extract_str:
-                # Split by commas for multiple fields
-                pairs = extract_str.split(",") if "," in extract_str else [extract_str]
-                for pair in pairs:
-                    if ":" in pair:
-                        key, value = pair.split(":", 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        # Field name aliases (handle variations)
-                        field_mappings = {
-                            'location_city': 'property_city',
-                            'city': 'property_city',
-                            'location_state': 'property_state',
-                            'state': 'property_state',
-                            'property_purpose': 'loan_purpose',
-                            'purpose': 'loan_purpose',
-                            'loan_type': 'loan_purpose'
-                        }
-                        mapped_key = field_mappings.get(key, key)
-                        
-                        # Skip empty/null values
-                        if value.lower() in ['none', 'null', '', 'n/a']:
-                            continue
-                        
-                        # Convert values to appropriate types
-                        if value.lower() == 'true':
-                            state[mapped_key] = True
-                            print(f">>> Extracted {mapped_key}: True")
-                        elif value.lower() == 'false':
-                            state[mapped_key] = False
-                            print(f">>> Extracted {mapped_key}: False")
-                        elif mapped_key in ['property_price', 'down_payment']:
-                            # Parse monetary values
-                            try:
-                                clean_value = value.replace('$', '').replace(',', '')
-                                state[mapped_key] = float(clean_value)
-                                print(f">>> Extracted {mapped_key}: {state[mapped_key]}")
-                            except ValueError:
-                                print(f">>> Failed to parse number: {value}")
-                                pass
-                        elif mapped_key == 'loan_purpose':
-                            state[mapped_key] = value.lower()
-                            print(f">>> Extracted {mapped_key}: {value.lower()}")
-                        else:
-                            state[mapped_key] = value
-                            print(f">>> Extracted {mapped_key}: {value}")
+            for key, value in conversation_result["extract"].items():
+                state[key] = value
+                print(f">>> Extracted {key}: {value}")
         
         # ---------------------------------------------------------------------
         # STEP 5: VALIDATION
@@ -0,0 +1,81 @@
+"""
+================================================================================
+LLM_CACHE.PY - RESPONSE CACHE FOR DETERMINISTIC LLM CALLS
+================================================================================
+
+In-memory LRU cache with TTL for temperature=0 completions. Short replies like
+"yes", "florida" or "300k" produce identical prompts across conversations, so
+repeated calls can be answered without another API round-trip.
+
+Safe to share across threads: API turns run in worker threads, so every
+operation holds the cache's lock.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Sequence, Tuple
+
+
+class LLMCache:
+    """LRU cache of LLM responses keyed on (model, messages, temperature)."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(model: str, messages: Sequence[Any], temperature: float) -> str:
+        """Stable hash of a request; messages are LangChain message objects."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": [{"role": m.type, "content": m.content} for m in messages],
+                "temperature": temperature,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response, or None on miss/expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a response, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
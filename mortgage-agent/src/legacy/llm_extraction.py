@@ -9,17 +9,48 @@ More accurate than regex, handles context and natural language.
 
 import os
 import json
-from typing import Dict, Any, Tuple, Optional
+import functools
+import string
+import unicodedata
+from typing import Dict, Any, FrozenSet, Tuple, Optional
+import orjson
 from openai import OpenAI
 
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+# Major cities whose name points to one state, resolved locally so the geo LLM
+# call is only needed for neighborhoods, regions and less common places. Names
+# shared by major cities in different states (e.g. Portland OR/ME) stay out
+# and go to the LLM, which can report them as ambiguous.
+CITY_TO_STATE = {
+    "Miami": "FL", "Orlando": "FL", "Tampa": "FL", "Jacksonville": "FL",
+    "Fort Lauderdale": "FL", "West Palm Beach": "FL", "Dallas": "TX",
+    "Austin": "TX", "Houston": "TX", "San Antonio": "TX", "New York": "NY",
+    "Los Angeles": "CA", "San Francisco": "CA", "San Diego": "CA",
+    "Seattle": "WA", "Phoenix": "AZ", "Atlanta": "GA",
+    "Boston": "MA", "Denver": "CO", "Chicago": "IL", "Nashville": "TN",
+    "Memphis": "TN", "Charlotte": "NC", "Raleigh": "NC", "Detroit": "MI",
+    "Milwaukee": "WI", "Minneapolis": "MN", "Las Vegas": "NV",
+}
+
+_PUNCT = str.maketrans("", "", string.punctuation)
+
+
+def _norm(s: str) -> str:
+    """Normalize place names: strip accents and punctuation, lowercase."""
+    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode().translate(_PUNCT).strip().lower()
+
+
+# Normalized lookup built once at import: "Orlándo", "orlando." → "orlando"
+_CITY_TO_STATE_NORM = {_norm(city): (city, state) for city, state in CITY_TO_STATE.items()}
+
 
 def normalize_location_with_llm(text: str) -> Dict[str, Any]:
     """
-    Use LLM to normalize geographic information without hardcoded maps.
+    Normalize geographic information: unambiguous major cities come from
+    CITY_TO_STATE, everything else is resolved by the LLM.
     
     Args:
         text: Location text from user (e.g., "Brickell", "South Florida", "33131")
@@ -27,6 +58,19 @@ def normalize_location_with_llm(text: str) -> Dict[str, Any]:
     Returns:
         Dict with: {neighborhood, city, state, country_iso, confidence, ambiguous, candidates}
     """
+    known = _CITY_TO_STATE_NORM.get(_norm(text))
+    if known:
+        city, state = known
+        return {
+            "neighborhood": None,
+            "city": city,
+            "state": state,
+            "country_iso": "US",
+            "confidence": 0.95,
+            "ambiguous": False,
+            "candidates": []
+        }
+    
     prompt = f"""You are a geographic normalization expert. Given location text, return a JSON object with geographic information.
 
 TEXT TO NORMALIZE: "{text}"
@@ -124,88 +168,146 @@ def _fallback_geo_result(text: str) -> Dict[str, Any]:
 
 
 # Valid US state codes
-US_STATES = [
+US_STATES: Tuple[str, ...] = (
     "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA",
     "HI", "ID", "IL", "IN", "IA", "KS", "KY", "LA", "ME", "MD",
     "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ",
     "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC",
     "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY", "DC"
-]
-
-
-EXTRACTION_FUNCTIONS = [
-    {
-        "name": "extract_mortgage_data",
-        "description": "Extract mortgage pre-qualification information from user message",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "down_payment": {
-                    "type": "number",
-                    "description": "Down payment amount in dollars (e.g., 50000 for $50k)"
-                },
-                "property_price": {
-                    "type": "number",
-                    "description": "Property price in dollars (e.g., 300000 for $300k)"
-                },
-                "property_city": {
-                    "type": "string",
-                    "description": "City where property is located (e.g., Miami, Dallas)"
-                },
-                "property_state": {
-                    "type": "string",
-                    "enum": US_STATES,
-                    "description": "Two-letter US state code (e.g., CA, FL, TX)"
-                },
-                "loan_purpose": {
-                    "type": "string",
-                    "enum": ["personal", "second", "investment"],
-                    "description": "Purpose: personal (primary residence), second (vacation home), or investment (rental)"
-                },
-                "has_valid_passport": {
-                    "type": "boolean",
-                    "description": "Whether user has a valid passport"
-                },
-                "has_valid_visa": {
-                    "type": "boolean",
-                    "description": "Whether user has a valid U.S. visa"
-                },
-                "current_location": {
-                    "type": "string",
-                    "enum": ["USA", "Origin Country"],
-                    "description": "Where user is currently located"
-                },
-                "can_demonstrate_income": {
-                    "type": "boolean",
-                    "description": "Whether user can provide income documentation"
-                },
-                "has_reserves": {
-                    "type": "boolean",
-                    "description": "Whether user has 6-12 months of reserves saved"
-                }
-            }
-        }
+)
+
+# O(1) membership checks for state validation
+_US_STATES_SET: FrozenSet[str] = frozenset(US_STATES)
+
+# Full state names the model sometimes returns instead of the code, keyed by
+# _norm() form ("New York", "new york." → "new york")
+_STATE_NAME_TO_CODE: Dict[str, str] = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR",
+    "california": "CA", "colorado": "CO", "connecticut": "CT", "delaware": "DE",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID",
+    "illinois": "IL", "indiana": "IN", "iowa": "IA", "kansas": "KS",
+    "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS",
+    "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK",
+    "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT",
+    "vermont": "VT", "virginia": "VA", "washington": "WA", "west virginia": "WV",
+    "wisconsin": "WI", "wyoming": "WY", "district of columbia": "DC",
+    "washington dc": "DC",
+}
+
+
+def _state_code(value: Any) -> Optional[str]:
+    """Map a state code or full state name to its code; None if unrecognized."""
+    text = str(value).strip()
+    if text.upper() in _US_STATES_SET:
+        return text.upper()
+    return _STATE_NAME_TO_CODE.get(_norm(text))
+
+_LOAN_PURPOSES: FrozenSet[str] = frozenset({"personal", "second", "investment"})
+
+# Off-enum loan purposes the model occasionally returns
+_LOAN_PURPOSE_SYNONYMS = {
+    "primary": "personal",
+    "primary residence": "personal",
+    "residence": "personal",
+    "home": "personal",
+    "purchase": "personal",
+    "second home": "second",
+    "vacation": "second",
+    "vacation home": "second",
+    "rental": "investment",
+    "income property": "investment",
+    "invest": "investment",
+}
+
+
+EXTRACTION_PROPERTIES = {
+    "down_payment": {
+        "type": "number",
+        "description": "Down payment amount in dollars (e.g., 50000 for $50k)"
+    },
+    "property_price": {
+        "type": "number",
+        "description": "Property price in dollars (e.g., 300000 for $300k)"
+    },
+    "property_city": {
+        "type": "string",
+        "description": "City where property is located (e.g., Miami, Dallas)"
+    },
+    "property_state": {
+        "type": "string",
+        "enum": list(US_STATES),
+        "description": "Two-letter US state code (e.g., CA, FL, TX)"
+    },
+    "loan_purpose": {
+        "type": "string",
+        "enum": ["personal", "second", "investment"],
+        "description": "Purpose: personal (primary residence), second (vacation home), or investment (rental)"
+    },
+    "has_valid_passport": {
+        "type": "boolean",
+        "description": "Whether user has a valid passport"
+    },
+    "has_valid_visa": {
+        "type": "boolean",
+        "description": "Whether user has a valid U.S. visa"
+    },
+    "current_location": {
+        "type": "string",
+        "enum": ["USA", "Origin Country"],
+        "description": "Where user is currently located"
+    },
+    "can_demonstrate_income": {
+        "type": "boolean",
+        "description": "Whether user can provide income documentation"
+    },
+    "has_reserves": {
+        "type": "boolean",
+        "description": "Whether user has 6-12 months of reserves saved"
     }
-]
+}
 
 
-def extract_with_llm(user_message: str, context: Optional[str] = None) -> Dict[str, Tuple[Any, float, str]]:
-    """
-    Extract mortgage data using OpenAI function calling.
-    
-    Args:
-        user_message: The user's latest message
-        context: Optional context about what was asked (e.g., "down_payment")
-    
-    Returns:
-        Dict[slot_name, (value, confidence, source)]
-    """
-    
-    # Build the prompt
-    messages = [
+def _build_extraction_functions(fields: Tuple[str, ...]) -> list:
+    """Build the extract_mortgage_data function schema restricted to `fields`."""
+    return [
         {
-            "role": "system",
-            "content": """You are a mortgage data extraction assistant for Foreign National loans. Extract information from user messages.
+            "name": "extract_mortgage_data",
+            "description": "Extract mortgage pre-qualification information from user message",
+            "parameters": {
+                "type": "object",
+                "properties": {field: EXTRACTION_PROPERTIES[field] for field in fields}
+            }
+        }
+    ]
+
+
+EXTRACTION_FUNCTIONS = _build_extraction_functions(tuple(EXTRACTION_PROPERTIES))
+
+# Minimal schemas for answers to a specific slot question - only the fields a
+# reply to that question plausibly contains, to cut input tokens per call.
+# Free-form messages (no context) still get the full schema.
+_FIELDS_BY_CONTEXT: Dict[str, Tuple[str, ...]] = {
+    "down_payment": ("down_payment", "property_price"),
+    "property_price": ("property_price", "down_payment"),
+    "loan_purpose": ("loan_purpose", "property_city", "property_state"),
+    "property_city": ("property_city", "property_state", "loan_purpose"),
+    "property_state": ("property_state", "property_city"),
+    "has_valid_passport": ("has_valid_passport", "has_valid_visa"),
+    "has_valid_visa": ("has_valid_visa", "has_valid_passport"),
+    "current_location": ("current_location",),
+    "can_demonstrate_income": ("can_demonstrate_income", "has_reserves"),
+    "has_reserves": ("has_reserves", "can_demonstrate_income"),
+}
+_SCHEMAS_BY_CONTEXT: Dict[str, list] = {
+    context: _build_extraction_functions(fields) for context, fields in _FIELDS_BY_CONTEXT.items()
+}
+
+
+_SYSTEM_BASE = """You are a mortgage data extraction assistant for Foreign National loans. Extract information from user messages.
 
 CRITICAL: Map loan purpose correctly:
 - "new home", "purchase", "buy", "primary residence" → "personal"
@@ -219,15 +321,63 @@ For locations, handle regional descriptions:
 - "Central Florida" → extract likely city (Orlando) + state (FL)
 
 Extract only information explicitly stated by the user."""
-        },
-        {
-            "role": "user",
-            "content": user_message
-        }
-    ]
+
+
+@functools.lru_cache(maxsize=16)
+def _system_msg(context: Optional[str]) -> Dict[str, str]:
+    """
+    Build the extraction system message for a given context (cached).
     
+    There are only ~10 slot contexts, so each message is built once and shared;
+    callers must not mutate the returned dict.
+    """
+    content = _SYSTEM_BASE
     if context:
-        messages[0]["content"] += f"\n\nContext: The user was just asked about {context}."
+        content += f"\n\nContext: The user was just asked about {context}."
+    return {"role": "system", "content": content}
+
+
+def _parse_streamed_arguments(buffer: str, fields: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a partially streamed function-call arguments buffer.
+    
+    Returns the arguments once nothing more can arrive for the schema: the
+    JSON object has closed, or every field in `fields` has been fully emitted
+    (i.e. followed by `,`). None otherwise.
+    """
+    head = buffer.rstrip()
+    if head.endswith("}"):
+        try:
+            return orjson.loads(head)
+        except orjson.JSONDecodeError:
+            return None  # a "}" inside a string value
+    
+    # A number like "5000" decodes before "50000" is complete - only values
+    # followed by their delimiter count
+    if not head.endswith(","):
+        return None
+    try:
+        parsed = orjson.loads(head[:-1] + "}")
+    except orjson.JSONDecodeError:
+        return None
+    if isinstance(parsed, dict) and all(field in parsed for field in fields):
+        return parsed
+    return None
+
+
+def extract_with_llm(user_message: str, context: Optional[str] = None) -> Dict[str, Tuple[Any, float, str]]:
+    """
+    Extract mortgage data using OpenAI function calling.
+    
+    Args:
+        user_message: The user's latest message
+        context: Optional context about what was asked (e.g., "down_payment")
+    
+    Returns:
+        Dict[slot_name, (value, confidence, source)]
+    """
+    
+    messages = [_system_msg(context), {"role": "user", "content": user_message}]
     
     try:
         print(f"\n>>> LLM EXTRACTION DEBUG:")
@@ -237,19 +387,43 @@ Extract only information explicitly stated by the user."""
         response = client.chat.completions.create(
             model=MODEL,
             messages=messages,
-            functions=EXTRACTION_FUNCTIONS,
+            functions=_SCHEMAS_BY_CONTEXT.get(context, EXTRACTION_FUNCTIONS),
             function_call={"name": "extract_mortgage_data"},
-            temperature=0.0  # Deterministic extraction
+            temperature=0.0,  # Deterministic extraction
+            stream=True
         )
         
-        # Parse function call result
-        function_call = response.choices[0].message.function_call
-        if not function_call:
-            print(f"    ⚠️  No function call returned by LLM")
-            return {}
+        # Accumulate streamed function call arguments, aborting the generation
+        # once every field in the schema has been fully emitted
+        fields = _FIELDS_BY_CONTEXT.get(context, tuple(EXTRACTION_PROPERTIES))
+        arguments = ""
+        extracted_raw = None
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            function_call = chunk.choices[0].delta.function_call
+            if not function_call or not function_call.arguments:
+                continue
+            arguments += function_call.arguments
+            extracted_raw = _parse_streamed_arguments(arguments, fields)
+            if extracted_raw is not None:
+                print("    Early abort once the arguments were complete")
+                response.close()
+                break
+        
+        if extracted_raw is None:
+            if not arguments:
+                print("    ⚠️  No function call returned by LLM")
+                return {}
+            # Stream finished without an early abort - parse the full arguments
+            extracted_raw = orjson.loads(arguments)
+        print(f"    Raw LLM response: {orjson.dumps(extracted_raw, option=orjson.OPT_INDENT_2).decode()}")
         
-        extracted_raw = json.loads(function_call.arguments)
-        print(f"    Raw LLM response: {json.dumps(extracted_raw, indent=2)}")
+        # Fix up out-of-schema values inline instead of paying for a re-prompt
+        if (st := extracted_raw.get("property_state")) and st not in _US_STATES_SET:
+            extracted_raw["property_state"] = _state_code(st)
+        if (purpose := extracted_raw.get("loan_purpose")) and purpose not in _LOAN_PURPOSES:
+            extracted_raw["loan_purpose"] = _LOAN_PURPOSE_SYNONYMS.get(str(purpose).strip().lower())
         
         # Convert to our format: (value, confidence, source)
         extracted = {}
@@ -0,0 +1,122 @@
+"""
+================================================================================
+LLM_POOL.PY - SHARED ASYNC REQUEST POOL FOR LLM CALLS
+================================================================================
+
+All conversations in a worker share one pool. It allows a bounded number of
+requests in flight at once and a token-bucket limit on requests per minute.
+Concurrent sessions overlap their network round-trips instead of queuing
+behind each other, and a burst of users does not exceed the API rate limit.
+
+CircuitBreaker lets callers stop calling the provider for a while after
+repeated failures and use their local fallbacks instead.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Sequence
+
+
+class LLMPool:
+    """Bounded-concurrency, rate-limited gateway for async LLM calls."""
+
+    def __init__(self, max_concurrency: int = 10, rate_limit: float = 100.0):
+        """
+        Args:
+            max_concurrency: Maximum requests in flight at once
+            rate_limit: Maximum requests started per minute
+        """
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket_lock = asyncio.Lock()
+        self._tokens = float(max_concurrency)
+        self._refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.completed = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    async def _take_token(self) -> None:
+        """Wait until the token bucket allows another request to start."""
+        refill_per_second = self.rate_limit / 60.0
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    float(self.max_concurrency),
+                    self._tokens + (now - self._refilled_at) * refill_per_second,
+                )
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / refill_per_second)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one request slot, e.g. for the lifetime of a streamed call."""
+        async with self._semaphore:
+            await self._take_token()
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def submit(self, runnable: Any, messages: Sequence[Any]) -> Any:
+        """Run runnable.ainvoke(messages) once a slot is available."""
+        async with self.slot():
+            return await runnable.ainvoke(messages)
+
+    def record_usage(self, message: Any) -> None:
+        """Accumulate prompt and provider-cached prompt tokens from an AIMessage."""
+        usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        self.prompt_tokens += usage.get("prompt_tokens") or 0
+        self.cached_tokens += (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+
+    def stats(self) -> dict:
+        """Pool counters for monitoring."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_limit": self.rate_limit,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "prompt_cache_hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+        }
+
+
+class CircuitBreaker:
+    """
+    Process-level breaker: opens after failure_threshold consecutive failures
+    and stays open for reset_timeout seconds. After that, calls go through
+    again (half-open): a success closes it, the next failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls should be skipped."""
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return False  # half-open: let a trial call through
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
@@ -3,44 +3,354 @@ Graph nodes for the mortgage pre-approval chatbot.
 Contains question nodes and extraction logic for Phase 2.
 """
 from langchain.prompts import ChatPromptTemplate
-from langchain.schema import HumanMessage
+from langchain.schema import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
-from typing import Optional
+from pathlib import Path
+from pydantic import BaseModel, Field
+from contextvars import ContextVar
+from typing import Any, Callable, Literal, Optional
+import asyncio
+import functools
+import json
+import logging
 import os
+import random
+import re
+import openai
 from .state import GraphState
+from .llm_cache import LLMCache
+from .llm_pool import CircuitBreaker, LLMPool
+
+logger = logging.getLogger(__name__)
+
+
+_OPENAI_KEY_RE = re.compile(r'^OPENAI_API_KEY=(.*)$', re.MULTILINE)
 
 
 # Load OpenAI API key from parent project's .env file
+@functools.lru_cache(maxsize=1)
 def load_openai_key():
-    """Load OpenAI API key from parent project."""
-    import os
-    from pathlib import Path
+    """Load OpenAI API key from the environment or the parent project (parsed once)."""
+    key = os.environ.get('OPENAI_API_KEY')
+    if key:
+        return key
     
     # Try to load from parent project's .env file
     parent_env_path = Path(__file__).parent.parent.parent / '.env'
     if parent_env_path.exists():
-        with open(parent_env_path, 'r') as f:
-            for line in f:
-                if line.startswith('OPENAI_API_KEY='):
-                    key = line.split('=', 1)[1].strip()
-                    os.environ['OPENAI_API_KEY'] = key
-                    print(f"Loaded OpenAI API key from {parent_env_path}")
-                    return key
+        match = _OPENAI_KEY_RE.search(parent_env_path.read_text())
+        if match:
+            key = match.group(1).strip()
+            os.environ['OPENAI_API_KEY'] = key
+            print(f"Loaded OpenAI API key from {parent_env_path}")
+            return key
     
-    # Fallback to environment variable
-    return os.getenv('OPENAI_API_KEY')
+    return None
 
 # Initialize LLM with proper API key
 try:
     api_key = load_openai_key()
     if api_key and not api_key.startswith('your-api'):
-        llm = ChatOpenAI(temperature=0, model="gpt-4o-mini", openai_api_key=api_key)
+        # Retries are handled by _ainvoke_llm so they go through the breaker
+        llm = ChatOpenAI(temperature=0, model="gpt-4o-mini", openai_api_key=api_key, max_retries=0)
+        # Single-message structured extraction: a small model is enough, and it
+        # can be swapped independently of the conversational model
+        llm_extract = ChatOpenAI(
+            temperature=0,
+            model=os.environ.get("OPENAI_EXTRACTION_MODEL", "gpt-4o-mini"),
+            openai_api_key=api_key,
+            max_retries=0,
+        )
         print("✅ OpenAI LLM initialized successfully")
     else:
         raise Exception("No valid OpenAI API key found")
 except Exception as e:
     print(f"Warning: OpenAI initialization failed: {e}")
     llm = None
+    llm_extract = None
+
+
+class ExtractedFields(BaseModel):
+    """Application fields the client provided in their latest message."""
+    property_city: Optional[str] = None
+    property_state: Optional[str] = None
+    property_price: Optional[int] = Field(None, description="Whole dollars, e.g. 1000000 for '1M'")
+    down_payment: Optional[int] = Field(None, description="Whole dollars, e.g. 300000 for '300k'")
+    loan_purpose: Optional[Literal["personal", "second", "investment"]] = None
+    has_valid_passport: Optional[bool] = None
+    has_valid_visa: Optional[bool] = None
+    current_location: Optional[Literal["USA", "Origin Country"]] = None
+    can_demonstrate_income: Optional[bool] = None
+    has_reserves: Optional[bool] = None
+
+
+class emit_turn(BaseModel):
+    """Emit the reply for this turn together with the extracted fields and the advance decision."""
+    response: str = Field(description="Natural, conversational reply to the client")
+    extracted: ExtractedFields = Field(default_factory=ExtractedFields, description="Fields provided in the client's latest message")
+    advance: bool = Field(description="True only if the client answered the CURRENT QUESTION")
+
+
+# One structured call per turn: reply + extraction + advance decision
+turn_llm = llm.bind_tools([emit_turn], tool_choice="emit_turn") if llm else None
+
+# Responses for temperature=0 calls, keyed on the exact prompt. Exact match
+# only: a turn's prompt carries the whole conversation and collected fields,
+# so a reply cached for a paraphrase of the last message (as semantic_cache
+# does for slot questions) could answer against a different history.
+llm_cache = LLMCache(max_size=1024, ttl_seconds=3600)
+
+# Shared by every session in this worker: bounded in-flight calls, 100 RPM
+llm_pool = LLMPool(
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "10")),
+    rate_limit=float(os.environ.get("LLM_RATE_LIMIT_RPM", "100")),
+)
+
+# Skip the provider for 30s after 5 consecutive failed calls
+llm_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+
+# Transient provider errors worth retrying (timeouts are connection errors)
+_RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+_MAX_ATTEMPTS = 3
+
+
+class LLMUnavailableError(Exception):
+    """The circuit breaker is open; callers should use their local fallback."""
+
+
+async def _submit_with_retry(runnable: Any, messages: list) -> Any:
+    """
+    Submit through the pool, retrying transient errors with jittered
+    exponential backoff (~1s, ~2s) and feeding the circuit breaker.
+    """
+    if llm_breaker.is_open:
+        raise LLMUnavailableError("LLM circuit breaker is open")
+    
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        try:
+            result = await llm_pool.submit(runnable, messages)
+        except _RETRYABLE_ERRORS as e:
+            if attempt == _MAX_ATTEMPTS:
+                llm_breaker.record_failure()
+                raise
+            delay = min(8.0, 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logger.warning("LLM call failed (%s), retrying in %.1fs", type(e).__name__, delay)
+            await asyncio.sleep(delay)
+        except openai.APIError:
+            llm_breaker.record_failure()
+            raise
+        else:
+            llm_breaker.record_success()
+            llm_pool.record_usage(result)
+            return result
+
+
+async def _ainvoke_llm(messages: list, runnable: Any = None, namespace: str = "chat", client: Optional[ChatOpenAI] = None) -> Any:
+    """
+    Invoke the LLM (or a tool-bound variant of it), serving deterministic
+    (temperature=0) calls from the cache. Returns the AIMessage.
+    
+    client is the underlying model (default: llm); runnable, if given, is a
+    variant of it such as turn_llm.
+    """
+    client = client or llm
+    runnable = runnable or client
+    if client.temperature != 0:
+        return await _submit_with_retry(runnable, messages)
+    
+    key = LLMCache.cache_key(f"{client.model_name}/{namespace}", messages, client.temperature)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    result = await _submit_with_retry(runnable, messages)
+    llm_cache.set(key, result)
+    return result
+
+
+# Set by a streaming transport (e.g. /chat/stream) to receive the reply text as
+# it is generated. Unset (None) means the turn is generated without streaming.
+response_token_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar("response_token_sink", default=None)
+
+_RESPONSE_VALUE_RE = re.compile(r'"response"\s*:\s*"')
+
+
+def _partial_response_text(arguments: str) -> str:
+    """
+    Decode the (possibly incomplete) "response" string from streamed emit_turn
+    arguments, e.g. '{"response": "Got it. Do you ha' → 'Got it. Do you ha'.
+    """
+    match = _RESPONSE_VALUE_RE.search(arguments)
+    if not match:
+        return ""
+    
+    start = match.end()
+    i = start
+    while i < len(arguments):
+        ch = arguments[i]
+        if ch == "\\":
+            # Stop before an escape sequence that hasn't fully arrived yet
+            width = 6 if arguments[i + 1:i + 2] == "u" else 2
+            if i + width > len(arguments):
+                break
+            i += width
+            continue
+        if ch == '"':
+            break
+        i += 1
+    
+    try:
+        return json.loads('"' + arguments[start:i] + '"')
+    except json.JSONDecodeError:
+        return ""
+
+
+async def _astream_turn(messages: list, sink: Callable[[str], None]) -> Any:
+    """
+    Stream an emit_turn call, pushing newly generated reply text to `sink` as it
+    arrives. The extracted fields and advance flag come after the reply and are
+    only read from the final accumulated message.
+    """
+    if llm_breaker.is_open:
+        raise LLMUnavailableError("LLM circuit breaker is open")
+    
+    # Not retried: part of the reply may already have reached the client
+    gathered = None
+    emitted = 0
+    async with llm_pool.slot():
+        try:
+            async for chunk in turn_llm.astream(messages):
+                gathered = chunk if gathered is None else gathered + chunk
+                if not gathered.tool_call_chunks:
+                    continue
+                text = _partial_response_text(gathered.tool_call_chunks[0].get("args") or "")
+                if len(text) > emitted:
+                    sink(text[emitted:])
+                    emitted = len(text)
+        except openai.APIError:
+            llm_breaker.record_failure()
+            raise
+    llm_breaker.record_success()
+    return gathered
+
+
+# Static instructions for generate_conversational_response. Kept as the first
+# (system) message and byte-identical across turns so OpenAI's automatic prompt
+# caching can reuse the prefix; per-turn data goes in the following message.
+CONVERSATIONAL_SYSTEM_PREFIX = """You are a warm, professional mortgage loan officer helping a client with Foreign Nationals loan pre-approval. 
+
+Each turn you receive the CONVERSATION STATE (current question, completed and pending questions), the recent conversation, the information already collected and the CLIENT'S LATEST MESSAGE.
+
+🚫 CRITICAL RULE - NEVER RE-ASK COMPLETED QUESTIONS!
+Before asking ANY question, check if it's in the COMPLETED list. If yes, skip it!
+
+💬 HOW TO RESPOND:
+
+IF CLIENT IS ASKING A QUESTION (like "how can I demonstrate income?", "what does reserves mean?"):
+1. Answer their question helpfully and conversationally
+2. THEN EXPLICITLY RE-ASK THE ORIGINAL QUESTION: "So, can you [original question]?"
+3. Example: "You can demonstrate income through bank statements or CPA letter. So, can you provide these documents?"
+4. Set advance=false (MUST stay on current question until answered)
+
+IF CLIENT PROVIDES INFO (actually answering your question):
+1. Acknowledge naturally - KEEP IT SHORT AND VARIED:
+   - Sometimes just move to next question without acknowledgment
+   - When acknowledging, use: "Got it!", "Thanks!", "Noted!", "I see!", "Makes sense!"
+   - Avoid overusing: "Great!", "Perfect!", "Excellent!", "Wonderful!", "Fantastic!"
+2. Extract the information
+3. If appropriate, provide helpful context (like affordability range)
+4. Move to the next question
+5. Set advance=true
+
+IF CLIENT SAYS "I DON'T KNOW" or "NOT SURE" (especially for Question 4 - property price):
+1. Provide help: Use AFFORDABILITY CONTEXT to suggest range
+2. THEN RE-ASK: "Based on that, what price range would you like to explore?"
+3. Wait for their answer - don't move forward without it
+4. Set advance=false (until they give a specific range or "yes that works")
+
+IF CLIENT PROVIDES MULTIPLE PIECES OF INFO AT ONCE:
+1. Extract ALL of them
+2. Acknowledge what they shared
+3. Return to the CURRENT QUESTION
+
+CORE RULES:
+✓ Be conversational and helpful - answer questions when asked
+✓ CRITICAL: After helping/explaining, ALWAYS return to the CURRENT QUESTION
+✓ NEVER SKIP AHEAD - Questions MUST be asked in strict order: Q1 → Q2 → Q3 → Q4 → Q5 → Q6 → Q7 → Q8
+✓ NEVER ask about COMPLETED questions - check the list!
+✓ Extract any info provided, even if out of order (but don't ask for it)
+✓ Only set advance=true when you've received the actual answer for the CURRENT QUESTION
+✓ If user provides info for Q5 while on Q3, extract it but STAY on Q3 and ask Q4 next
+✓ Keep responses natural (2-3 sentences)
+
+EXTRACTION GUIDE:
+Q1 (down payment): "300k saved", "i have 300k", "$300,000" → down_payment: 300000
+Q2 (location): "miami", "coconut grove" → property_city: Miami | "florida", "FL" → property_state: Florida  
+Q3 (purpose): "investment", "rental" → loan_purpose: investment | "primary residence", "personal home", "live in" → loan_purpose: personal | "second home", "vacation" → loan_purpose: second
+Q4 (price): "1 mill", "1M", "$1,000,000" → property_price: 1000000 | "900k" → property_price: 900000
+Q5 (docs): "yes" → has_valid_passport: True, has_valid_visa: True | "yes passport and visa" → has_valid_passport: True, has_valid_visa: True | "I have both" → has_valid_passport: True, has_valid_visa: True
+Q6 (location): "in US", "USA", "United States", "I'm in the USA" → current_location: USA | "mexico", "colombia", "brazil", "canada", "home country" → current_location: Origin Country
+Q7 (income): "yes", "I can", "bank statements", "tax returns" → can_demonstrate_income: True | "no" → can_demonstrate_income: False
+Q8 (reserves): "yes", "I have reserves", "6 months", "3 months worth" → has_reserves: True | "no" → has_reserves: False
+
+CRITICAL: Use standard values for loan_purpose: "personal", "second", or "investment" (not "primary residence"!)
+
+CRITICAL:
+- Numbers with "k" are thousands: 300k = 300000
+- "I have X" or "saved X" = DOWN PAYMENT (not income!)
+- Extract ANY info provided, even if not the current question
+
+ALWAYS REPLY BY CALLING emit_turn WITH:
+- response: Your natural, conversational response - DO NOT re-ask for info already collected
+- extracted: Every field the client provided (leave the rest null)
+- advance: true if you got meaningful info for current question, false if still need info
+
+Example correct turns:
+
+WHEN THEY ANSWER YOUR QUESTION:
+response: "$1 million in Miami for investment. Do you have a valid passport and visa?"
+extracted: {"property_price": 1000000}
+advance: true
+
+WHEN THEY ASK FOR HELP:
+response: "You can demonstrate income through bank statements, tax returns, or a CPA letter. So, can you provide these documents?"
+extracted: {}
+advance: false
+
+WHEN THEY SAY "I DON'T KNOW":
+response: "Let me help! With $300k down, you could afford properties from $720k to $1.2M. What price range interests you?"
+extracted: {}
+advance: false"""
+
+
+# Static instructions for extract_with_enhanced_llm (same prefix-caching layout)
+EXTRACTION_SYSTEM_PREFIX = """Extract information from a client's message for a mortgage application.
+
+Extract any of the following information from their message:
+- Property city (if mentioned)
+- Property state (if mentioned) 
+- Property price (IMPORTANT: convert to number - "1 mill"/"1M"/"one million" = 1000000, "500K" = 500000)
+- Down payment amount (convert to number - "300k" = 300000)
+- Loan purpose (Personal Home/Second Home/Investment - "rental" = Investment)
+- Has passport (true/false - if they say "yes" to "passport and visa", set BOTH to true)
+- Has visa (true/false - if they say "yes" to "passport and visa", set BOTH to true)
+- Current location (USA/Origin Country - any non-US country = Origin Country)
+- Can demonstrate income (true/false)
+- Has reserves (true/false)
+
+RESPOND WITH EXACTLY THIS FORMAT:
+property_city: [value or null]
+property_state: [value or null] 
+property_price: [number or null]
+down_payment: [number or null]
+loan_purpose: [value or null]
+has_valid_passport: [true/false or null]
+has_valid_visa: [true/false or null]
+current_location: [value or null]
+can_demonstrate_income: [true/false or null]
+has_reserves: [true/false or null]
+
+Only include values that are clearly mentioned or implied in their message."""
 
 
 def calculate_affordability_range(down_payment: float) -> dict:
@@ -66,14 +376,92 @@ def calculate_affordability_range(down_payment: float) -> dict:
         }
 
 
-def generate_conversational_response(state: GraphState) -> dict:
+# Fields summarized for the LLM, in prompt order
+_KNOWN_CONTEXT_FIELDS = (
+    "property_city", "property_state", "loan_purpose", "property_price", "down_payment",
+    "has_valid_passport", "has_valid_visa", "current_location", "can_demonstrate_income", "has_reserves",
+)
+
+
+def build_known_context(state: GraphState) -> str:
+    """
+    Summarize the information collected so far for the LLM prompts.
+    
+    The text is cached on the state and rebuilt only when one of the collected
+    fields changes, so the conversational turn and the extractor share it.
+    """
+    signature = tuple(state.get(field) for field in _KNOWN_CONTEXT_FIELDS)
+    cached = state.get("_known_context_cache")
+    if cached and cached[0] == signature:
+        return cached[1]
+    
+    known_info = []
+    if state.get("property_city") or state.get("property_state"):
+        location = f"{state.get('property_city', '')}, {state.get('property_state', '')}".strip(', ')
+        known_info.append(f"Property location: {location}")
+    if state.get("loan_purpose"):
+        known_info.append(f"Loan purpose: {state.get('loan_purpose')}")
+    if state.get("property_price"):
+        known_info.append(f"Property price: ${state.get('property_price'):,.0f}")
+    if state.get("down_payment"):
+        known_info.append(f"Down payment: ${state.get('down_payment'):,.0f}")
+    if state.get("has_valid_passport") is not None:
+        known_info.append(f"Has passport: {state.get('has_valid_passport')}")
+    if state.get("has_valid_visa") is not None:
+        known_info.append(f"Has visa: {state.get('has_valid_visa')}")
+    if state.get("current_location"):
+        known_info.append(f"Current location: {state.get('current_location')}")
+    if state.get("can_demonstrate_income") is not None:
+        known_info.append(f"Can demonstrate income: {state.get('can_demonstrate_income')}")
+    if state.get("has_reserves") is not None:
+        known_info.append(f"Has reserves: {state.get('has_reserves')}")
+    
+    known_context = "\n".join(known_info) if known_info else "No information collected yet"
+    state["_known_context_cache"] = (signature, known_context)
+    return known_context
+
+
+# What we need for each question - NEW ORDER: Down payment first!
+# Q1=down payment, Q2=location, Q3=purpose, Q4=price, Q5-8=same
+QUESTION_OBJECTIVES = {
+    1: "Get down payment amount (what they have saved)",
+    2: "Get city/state where they want to buy",
+    3: "Get loan purpose (personal home, second home, or investment)",
+    4: "Get property price range (offer to help calculate if they're unsure)",
+    5: "Get passport and visa status",
+    6: "Get current location (USA or home country)",
+    7: "Get income documentation capability",
+    8: "Get reserves status (6-12 months)"
+}
+
+# Per-turn message that follows CONVERSATIONAL_SYSTEM_PREFIX; only the
+# placeholders change between turns
+TURN_PROMPT_TEMPLATE = """📋 CONVERSATION STATE:
+- Currently on Question #{current_q} of 8
+- Task: {current_objective}
+
+✅ COMPLETED QUESTIONS (NEVER ASK AGAIN): {completed_str}
+⏳ CURRENT QUESTION: Q{current_q} - {current_objective}
+⏸️ PENDING QUESTIONS: {pending_str}
+
+RECENT CONVERSATION:
+{recent_messages}
+
+📝 INFORMATION ALREADY COLLECTED:
+{known_context}
+{affordability_info}
+
+CLIENT'S LATEST MESSAGE: "{last_user_message}\""""
+
+
+async def generate_conversational_response(state: GraphState) -> dict:
     """
     Unified LLM-based response system that handles any user input naturally.
     Returns both the response and whether to advance to the next question.
     """
     # Removed delays for faster response
     
-    if not llm:
+    if not llm or llm_breaker.is_open:
         return {"response": "I'm here to help with your mortgage pre-approval. Please let me know how I can assist you.", "advance": False}
     
     try:
@@ -86,9 +474,9 @@ def generate_conversational_response(state: GraphState) -> dict:
         last_user_message = user_messages[-1]["content"]
         current_q = state.get("current_question", 1)
         
-        print(f"\n=== CONVERSATIONAL RESPONSE DEBUG ===")
-        print(f"Current Question: {current_q}")
-        print(f"Last User Message: {last_user_message}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("=== CONVERSATIONAL RESPONSE DEBUG === Q%s, last user message: %s", current_q, last_user_message)
         
         # Build conversation context
         recent_messages = ""
@@ -99,72 +487,12 @@ def generate_conversational_response(state: GraphState) -> dict:
                 recent_messages += f"{role}: {msg['content']}\n"
         
         # Get what we know so far - be comprehensive to avoid re-asking
-        known_info = []
-        collected_data = []
+        known_context = build_known_context(state)
         
-        if state.get("property_city") or state.get("property_state"):
-            location = f"{state.get('property_city', '')}, {state.get('property_state', '')}".strip(', ')
-            known_info.append(f"Property location: {location}")
-            collected_data.append("location")
-            
-        if state.get("loan_purpose"):
-            known_info.append(f"Loan purpose: {state.get('loan_purpose')}")
-            collected_data.append("loan_purpose")
-            
-        if state.get("property_price"):
-            known_info.append(f"Property price: ${state.get('property_price'):,.0f}")
-            collected_data.append("property_price")
-            
-        if state.get("down_payment"):
-            known_info.append(f"Down payment: ${state.get('down_payment'):,.0f}")
-            collected_data.append("down_payment")
-            
-        if state.get("has_valid_passport") is not None:
-            known_info.append(f"Has passport: {state.get('has_valid_passport')}")
-            collected_data.append("passport")
-            
-        if state.get("has_valid_visa") is not None:
-            known_info.append(f"Has visa: {state.get('has_valid_visa')}")
-            collected_data.append("visa")
-            
-        if state.get("current_location"):
-            known_info.append(f"Current location: {state.get('current_location')}")
-            collected_data.append("current_location")
-            
-        if state.get("can_demonstrate_income") is not None:
-            known_info.append(f"Can demonstrate income: {state.get('can_demonstrate_income')}")
-            collected_data.append("income_documentation")
-            
-        if state.get("has_reserves") is not None:
-            known_info.append(f"Has reserves: {state.get('has_reserves')}")
-            collected_data.append("reserves")
+        if debug:
+            logger.debug("State data collected:\n%s", known_context)
         
-        known_context = "\n".join(known_info) if known_info else "No information collected yet"
-        
-        print(f"State Data Collected:")
-        print(f"  - Location: {state.get('property_city')}, {state.get('property_state')}")
-        print(f"  - Loan Purpose: {state.get('loan_purpose')}")
-        print(f"  - Property Price: {state.get('property_price')}")
-        print(f"  - Down Payment: {state.get('down_payment')}")
-        print(f"  - Passport/Visa: {state.get('has_valid_passport')}/{state.get('has_valid_visa')}")
-        print(f"  - Current Location: {state.get('current_location')}")
-        print(f"  - Income Docs: {state.get('can_demonstrate_income')}")
-        print(f"  - Reserves: {state.get('has_reserves')}")
-        
-        # Define what we need for each question - NEW ORDER: Down payment first!
-        # NEW ORDER: Q1=down payment, Q2=location, Q3=purpose, Q4=price, Q5-8=same
-        question_objectives = {
-            1: "Get down payment amount (what they have saved)",
-            2: "Get city/state where they want to buy",
-            3: "Get loan purpose (personal home, second home, or investment)",  
-            4: "Get property price range (offer to help calculate if they're unsure)",
-            5: "Get passport and visa status",
-            6: "Get current location (USA or home country)",
-            7: "Get income documentation capability",
-            8: "Get reserves status (6-12 months)"
-        }
-        
-        current_objective = question_objectives.get(current_q, "All questions completed")
+        current_objective = QUESTION_OBJECTIVES.get(current_q, "All questions completed")
         
         # Track completed vs pending questions explicitly
         completed_questions = []
@@ -219,155 +547,31 @@ def generate_conversational_response(state: GraphState) -> dict:
             calc = calculate_affordability_range(state.get("down_payment"))
             affordability_info = f"\nAFFORDABILITY CONTEXT: {calc['message']}"
         
-        prompt = f"""You are a warm, professional mortgage loan officer helping a client with Foreign Nationals loan pre-approval. 
-
-📋 CONVERSATION STATE:
-- Currently on Question #{current_q} of 8
-- Task: {current_objective}
-
-✅ COMPLETED QUESTIONS (NEVER ASK AGAIN): {completed_str}
-⏳ CURRENT QUESTION: Q{current_q} - {current_objective}
-⏸️ PENDING QUESTIONS: {pending_str}
-
-RECENT CONVERSATION:
-{recent_messages}
-
-📝 INFORMATION ALREADY COLLECTED:
-{known_context}
-{affordability_info}
-
-🚫 CRITICAL RULE - NEVER RE-ASK COMPLETED QUESTIONS!
-Before asking ANY question, check if it's in the COMPLETED list above. If yes, skip it!
-
-CLIENT'S LATEST MESSAGE: "{last_user_message}"
+        prompt = TURN_PROMPT_TEMPLATE.format(
+            current_q=current_q,
+            current_objective=current_objective,
+            completed_str=completed_str,
+            pending_str=pending_str,
+            recent_messages=recent_messages,
+            known_context=known_context,
+            affordability_info=affordability_info,
+            last_user_message=last_user_message,
+        )
 
-💬 HOW TO RESPOND:
-
-IF CLIENT IS ASKING A QUESTION (like "how can I demonstrate income?", "what does reserves mean?"):
-1. Answer their question helpfully and conversationally
-2. THEN EXPLICITLY RE-ASK THE ORIGINAL QUESTION: "So, can you [original question]?"
-3. Example: "You can demonstrate income through bank statements or CPA letter. So, can you provide these documents?"
-4. Set ADVANCE: false (MUST stay on current question until answered)
-
-IF CLIENT PROVIDES INFO (actually answering your question):
-1. Acknowledge naturally - KEEP IT SHORT AND VARIED:
-   - Sometimes just move to next question without acknowledgment
-   - When acknowledging, use: "Got it!", "Thanks!", "Noted!", "I see!", "Makes sense!"
-   - Avoid overusing: "Great!", "Perfect!", "Excellent!", "Wonderful!", "Fantastic!"
-2. Extract the information
-3. If appropriate, provide helpful context (like affordability range)
-4. Move to the next question
-5. Set ADVANCE: true
-
-IF CLIENT SAYS "I DON'T KNOW" or "NOT SURE" (especially for Question 4 - property price):
-1. Provide help: Use AFFORDABILITY CONTEXT to suggest range
-2. THEN RE-ASK: "Based on that, what price range would you like to explore?"
-3. Wait for their answer - don't move forward without it
-4. Set ADVANCE: false (until they give a specific range or "yes that works")
-
-IF CLIENT PROVIDES MULTIPLE PIECES OF INFO AT ONCE:
-1. Extract ALL of them
-2. Acknowledge what they shared
-3. Return to the CURRENT QUESTION (Q{current_q})
-
-CORE RULES:
-✓ Be conversational and helpful - answer questions when asked
-✓ CRITICAL: After helping/explaining, ALWAYS return to Q{current_q}: {current_objective}
-✓ NEVER SKIP AHEAD - Questions MUST be asked in strict order: Q1 → Q2 → Q3 → Q4 → Q5 → Q6 → Q7 → Q8
-✓ NEVER ask about COMPLETED questions - check the list above!
-✓ Extract any info provided, even if out of order (but don't ask for it)
-✓ Only set ADVANCE: true when you've received the actual answer for the CURRENT question Q{current_q}
-✓ If user provides info for Q5 while on Q3, extract it but STAY on Q3 and ask Q4 next
-✓ Keep responses natural (2-3 sentences)
-
-EXTRACTION GUIDE (Question #{current_q}):
-Q1 (down payment): "300k saved", "i have 300k", "$300,000" → down_payment: 300000
-Q2 (location): "miami", "coconut grove" → property_city: Miami | "florida", "FL" → property_state: Florida  
-Q3 (purpose): "investment", "rental" → loan_purpose: investment | "primary residence", "personal home", "live in" → loan_purpose: personal | "second home", "vacation" → loan_purpose: second
-Q4 (price): "1 mill", "1M", "$1,000,000" → property_price: 1000000 | "900k" → property_price: 900000
-Q5 (docs): "yes" → has_valid_passport: True, has_valid_visa: True | "yes passport and visa" → has_valid_passport: True, has_valid_visa: True | "I have both" → has_valid_passport: True, has_valid_visa: True
-Q6 (location): "in US", "USA", "United States", "I'm in the USA" → current_location: USA | "mexico", "colombia", "brazil", "canada", "home country" → current_location: Origin Country
-Q7 (income): "yes", "I can", "bank statements", "tax returns" → can_demonstrate_income: True | "no" → can_demonstrate_income: False
-Q8 (reserves): "yes", "I have reserves", "6 months", "3 months worth" → has_reserves: True | "no" → has_reserves: False
-
-CRITICAL: Use standard values for loan_purpose: "personal", "second", or "investment" (not "primary residence"!)
-
-CRITICAL:
-- Numbers with "k" are thousands: 300k = 300000
-- "I have X" or "saved X" = DOWN PAYMENT (not income!)
-- Extract ANY info provided, even if not the current question
-
-YOU MUST RESPOND WITH EXACTLY THIS FORMAT (all 3 lines required):
-RESPONSE: [Your natural, conversational response - DO NOT re-ask for info already collected]
-EXTRACT: [field: value, field2: value2 - or "none" if nothing to extract]
-ADVANCE: [true if you got meaningful info for current question, false if still need info]
-
-Example correct responses:
-
-WHEN THEY ANSWER YOUR QUESTION:
-RESPONSE: $1 million in Miami for investment. Do you have a valid passport and visa?
-EXTRACT: property_price: 1000000
-ADVANCE: true
-
-WHEN THEY ASK FOR HELP:
-RESPONSE: You can demonstrate income through bank statements, tax returns, or a CPA letter. So, can you provide these documents?
-EXTRACT: none
-ADVANCE: false
-
-WHEN THEY SAY "I DON'T KNOW":
-RESPONSE: Let me help! With $300k down, you could afford properties from $720k to $1.2M. What price range interests you?
-EXTRACT: none  
-ADVANCE: false"""
-
-        llm_response = llm.invoke([HumanMessage(content=prompt)])
-        response_text = llm_response.content
-        
-        print(f"\nLLM Response:")
-        print(response_text[:500])  # First 500 chars
-        
-        # Parse the LLM response
-        lines = response_text.strip().split('\n')
-        response = ""
-        extract_info = "none"
-        advance = False
+        messages = [SystemMessage(content=CONVERSATIONAL_SYSTEM_PREFIX), HumanMessage(content=prompt)]
+        sink = response_token_sink.get()
+        if sink:
+            llm_response = await _astream_turn(messages, sink)
+        else:
+            llm_response = await _ainvoke_llm(messages, runnable=turn_llm, namespace="emit_turn")
         
-        for line in lines:
-            if line.startswith("RESPONSE:"):
-                response = line.replace("RESPONSE:", "").strip()
-            elif line.startswith("EXTRACT:"):
-                extract_info = line.replace("EXTRACT:", "").strip()
-            elif line.startswith("ADVANCE:"):
-                advance_text = line.replace("ADVANCE:", "").strip().lower()
-                advance = advance_text in ["true", "yes"]
+        turn = llm_response.tool_calls[0]["args"]
+        response = turn.get("response", "")
+        extract_info = {k: v for k, v in (turn.get("extracted") or {}).items() if v is not None}
+        advance = bool(turn.get("advance", False))
         
-        # Safety net: If parsing failed, use the whole response
-        if not response:
-            response = response_text
-            
-            # Check if this looks like an acknowledgment even without proper format
-            acknowledgment_phrases = [
-                "perfect", "great", "excellent", "wonderful", "fantastic",
-                "got it", "noted", "understood", "sounds good", "that works"
-            ]
-            
-            response_lower = response.lower()
-            
-            # If response acknowledges info and mentions a value, assume we should advance
-            if any(phrase in response_lower for phrase in acknowledgment_phrases):
-                # Check if response contains the expected data type for current question
-                if current_q == 3 and ("$" in response or "million" in response_lower or "000" in response):
-                    advance = True
-                elif current_q == 4 and ("$" in response or "down" in response_lower or "000" in response):
-                    advance = True
-                elif current_q in [1, 2, 5, 6, 7, 8] and len(response_lower) < 200:
-                    # For other questions, if it's a short acknowledgment, likely got the info
-                    advance = True
-        
-        print(f"\nParsed Results:")
-        print(f"  - Response: {response[:100]}...")
-        print(f"  - Extract: {extract_info}")
-        print(f"  - Advance: {advance}")
-        print("=== END DEBUG ===\n")
+        if debug:
+            logger.debug("Parsed turn: response=%.100s extract=%s advance=%s", response, extract_info, advance)
             
         return {
             "response": response,
@@ -383,7 +587,31 @@ ADVANCE: false"""
         }
 
 
-def extract_info_node(state: GraphState) -> GraphState:
+# Multiplier for the unit written after an amount
+_SCALE = {
+    'million': 1_000_000, 'millions': 1_000_000, 'mill': 1_000_000, 'mil': 1_000_000, 'm': 1_000_000,
+    'thousand': 1_000, 'thousands': 1_000, 'k': 1_000,
+}
+
+
+def parse_amount(number_str: str, suffix: Optional[str] = None) -> int:
+    """
+    Whole-dollar amount from a matched number and optional unit, in integer
+    arithmetic: ('1.5', 'million') → 1500000, ('$300,000', None) → 300000.
+    
+    Raises ValueError if number_str has no digits.
+    """
+    whole, _, frac = number_str.strip().lstrip('$').replace(',', '').partition('.')
+    if not (whole or frac):
+        raise ValueError(f"no digits in amount {number_str!r}")
+    scale = _SCALE.get((suffix or '').lower(), 1)
+    amount = int(whole or '0') * scale
+    if frac:
+        amount += int(frac) * scale // 10 ** len(frac)
+    return amount
+
+
+async def extract_info_node(state: GraphState) -> GraphState:
     """
     Extract information from user responses using enhanced LLM and pattern matching.
     Updates the appropriate field in GraphState based on current_question.
@@ -401,10 +629,10 @@ def extract_info_node(state: GraphState) -> GraphState:
     
     print(f"\n>>> Extraction for Q{current_q}: '{last_user_message[:50]}...'")
     
-    # Use enhanced LLM extraction first
-    if llm:
+    # Use enhanced LLM extraction first, unless the provider is failing
+    if llm and not llm_breaker.is_open:
         try:
-            extracted_data = extract_with_enhanced_llm(last_user_message, current_q, state)
+            extracted_data = await extract_with_enhanced_llm(last_user_message, current_q, state)
             if extracted_data:
                 for key, value in extracted_data.items():
                     if value is not None:
@@ -419,96 +647,57 @@ def extract_info_node(state: GraphState) -> GraphState:
     return state
 
 
-def extract_with_enhanced_llm(user_message: str, current_question: int, state: GraphState) -> dict:
+# One "field: value" pair per line of the extraction response
+_KV_RE = re.compile(r'^[ \t]*(\w+)[ \t]*:[ \t]*(.*?)[ \t]*$', re.M)
+_NULL_VALUES = frozenset({'null', 'none', ''})
+
+# Alternate field names the model sometimes uses
+_FIELD_MAPPINGS = {
+    'location_city': 'property_city',
+    'location_state': 'property_state',
+    'property_purpose': 'loan_purpose',
+}
+
+
+async def extract_with_enhanced_llm(user_message: str, current_question: int, state: GraphState) -> dict:
     """Enhanced LLM extraction that considers conversation context."""
-    if not llm:
+    if not llm_extract:
         return {}
     
     try:
-        # Build context from the conversation
-        known_info = []
-        if state.get("property_city") or state.get("property_state"):
-            location = f"{state.get('property_city', '')}, {state.get('property_state', '')}".strip(', ')
-            known_info.append(f"Property location: {location}")
-        if state.get("loan_purpose"):
-            known_info.append(f"Loan purpose: {state.get('loan_purpose')}")
-        if state.get("property_price"):
-            known_info.append(f"Property price: ${state.get('property_price'):,.0f}")
-        if state.get("down_payment"):
-            known_info.append(f"Down payment: ${state.get('down_payment'):,.0f}")
+        # Build context from the conversation (shared with the conversational turn)
+        known_context = build_known_context(state)
         
-        known_context = "\n".join(known_info) if known_info else "No information collected yet"
-        
-        prompt = f"""Extract information from this client's message for a mortgage application.
-
-CLIENT MESSAGE: "{user_message}"
+        prompt = f"""CLIENT MESSAGE: "{user_message}"
 
 CURRENT QUESTION FOCUS: Question {current_question}
 WHAT WE ALREADY KNOW:
-{known_context}
-
-Extract any of the following information from their message:
-- Property city (if mentioned)
-- Property state (if mentioned) 
-- Property price (IMPORTANT: convert to number - "1 mill"/"1M"/"one million" = 1000000, "500K" = 500000)
-- Down payment amount (convert to number - "300k" = 300000)
-- Loan purpose (Personal Home/Second Home/Investment - "rental" = Investment)
-- Has passport (true/false - if they say "yes" to "passport and visa", set BOTH to true)
-- Has visa (true/false - if they say "yes" to "passport and visa", set BOTH to true)
-- Current location (USA/Origin Country - any non-US country = Origin Country)
-- Can demonstrate income (true/false)
-- Has reserves (true/false)
+{known_context}"""
 
-RESPOND WITH EXACTLY THIS FORMAT:
-property_city: [value or null]
-property_state: [value or null] 
-property_price: [number or null]
-down_payment: [number or null]
-loan_purpose: [value or null]
-has_valid_passport: [true/false or null]
-has_valid_visa: [true/false or null]
-current_location: [value or null]
-can_demonstrate_income: [true/false or null]
-has_reserves: [true/false or null]
-
-Only include values that are clearly mentioned or implied in their message."""
-
-        response = llm.invoke([HumanMessage(content=prompt)])
-        response_text = response.content
+        messages = [SystemMessage(content=EXTRACTION_SYSTEM_PREFIX), HumanMessage(content=prompt)]
+        response_text = (await _ainvoke_llm(messages, namespace="extract", client=llm_extract)).content
         
-        # Parse the response with field name mapping
+        # Parse the "field: value" lines with field name mapping
         extracted = {}
-        field_mappings = {
-            'location_city': 'property_city',
-            'location_state': 'property_state',
-            'property_purpose': 'loan_purpose',
-            'property_type': 'property_type'
-        }
-        
-        for line in response_text.strip().split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Map field names if needed
-                mapped_key = field_mappings.get(key, key)
-                
-                if value.lower() in ['null', 'none', '']:
+        for key, value in _KV_RE.findall(response_text):
+            mapped_key = _FIELD_MAPPINGS.get(key, key)
+            value_lower = value.lower()
+            
+            if value_lower in _NULL_VALUES:
+                continue
+            elif value_lower == 'true':
+                extracted[mapped_key] = True
+            elif value_lower == 'false':
+                extracted[mapped_key] = False
+            elif mapped_key in ('property_price', 'down_payment'):
+                try:
+                    extracted[mapped_key] = parse_amount(value)
+                except ValueError:
                     continue
-                elif value.lower() == 'true':
-                    extracted[mapped_key] = True
-                elif value.lower() == 'false':
-                    extracted[mapped_key] = False
-                elif mapped_key in ['property_price', 'down_payment']:
-                    try:
-                        extracted[mapped_key] = float(value)
-                    except ValueError:
-                        continue
-                elif mapped_key == 'loan_purpose':
-                    extracted[mapped_key] = value.lower()
-                else:
-                    extracted[mapped_key] = value
+            elif mapped_key == 'loan_purpose':
+                extracted[mapped_key] = value_lower
+            else:
+                extracted[mapped_key] = value
         
         return extracted
         
@@ -517,15 +706,59 @@ Only include values that are clearly mentioned or implied in their message."""
         return {}
 
 
+# Property price patterns, tried in order; group 2 (when present) is the unit
+_PRICE_RE = [re.compile(p, re.I) for p in (
+    r'\$?([\d,]+(?:\.\d+)?)\s*(million|millions|mil|mill|m)\b',  # 1.5 million, 1 mill
+    r'\$?([\d,]+(?:\.\d+)?)\s*(thousand|thousands|k)\b',     # 500k
+    r'\$?([\d,]+(?:\.\d+)?)',                        # $500,000
+)]
+
+# Down payment patterns - including "I have X saved" and "saved X"
+# Group 1 is the number, group 2 the optional unit (see _SCALE)
+_DP_RE = [re.compile(p, re.I) for p in (
+    r'down\s+payment[:\s]+\$?([\d,]+(?:\.\d+)?)\s*(k|thousand)?',
+    r'\$?([\d,]+(?:\.\d+)?)\s*(k|thousand)?\s+down',
+    r'put\s+down\s+\$?([\d,]+(?:\.\d+)?)\s*(k|thousand)?',
+    r'(?:have|saved|got)\s+\$?([\d,]+(?:\.\d+)?)\s*(k|thousand)?\s*(?:saved)?',  # "have 300k saved" or "saved 300k"
+    r'\$?([\d,]+(?:\.\d+)?)\s*(k|thousand)?\s+saved',  # "300k saved"
+)]
+
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Replies to the pre-qualification letter offer; one pass per message, whole
+# words only (so "ok" does not match "book" or "no" match "know")
+_YES_RE = re.compile(r'\b(?:yes|sure|okay|ok|send|please|si|sí)\b', re.IGNORECASE)
+_NO_RE = re.compile(r'\b(?:no|nope|not|later|non|nein)\b', re.IGNORECASE)
+
+
+# Chat history kept on the state; older user text lives on in _user_text_concat
+MAX_HISTORY_MESSAGES = 32
+
+
+def record_user_message(state: GraphState, content: str) -> None:
+    """
+    Append a user message to the history, fold it into the running
+    _user_text_concat, note it as _last_user_content and drop history beyond
+    MAX_HISTORY_MESSAGES.
+    """
+    state["messages"].append({"role": "user", "content": content})
+    state["_last_user_content"] = content
+    state["_user_text_concat"] = state.get("_user_text_concat", "") + " " + content.lower()
+    if len(state["messages"]) > MAX_HISTORY_MESSAGES:
+        del state["messages"][:-MAX_HISTORY_MESSAGES]
+
+
 def extract_from_full_conversation(state: GraphState) -> None:
     """Extract information from the entire conversation context using patterns."""
-    # Combine all user messages for comprehensive extraction
-    user_messages = [msg["content"] for msg in state["messages"] if msg["role"] == "user"]
-    full_conversation = " ".join(user_messages).lower()
+    # All user text so far, maintained by record_user_message
+    full_conversation = state.get("_user_text_concat")
+    if full_conversation is None:
+        # State built without record_user_message (e.g. tests) - join the history
+        user_messages = [msg["content"] for msg in state["messages"] if msg["role"] == "user"]
+        full_conversation = " ".join(user_messages).lower()
     
     # Extract location information (city/state) if not already found
     if not state.get("property_city"):
-        import re
         # Common US cities
         cities = ['miami', 'coconut grove', 'new york', 'los angeles', 'chicago', 
                  'houston', 'phoenix', 'san francisco', 'dallas', 'boston', 
@@ -537,7 +770,6 @@ def extract_from_full_conversation(state: GraphState) -> None:
                 break
     
     if not state.get("property_state"):
-        import re
         # State abbreviations and names
         states = {
             'fl': 'Florida', 'florida': 'Florida',
@@ -585,55 +817,24 @@ def extract_from_full_conversation(state: GraphState) -> None:
     
     # Extract property price if not already found
     if not state.get("property_price"):
-        import re
-        price_patterns = [
-            r'\$?([\d,]+(?:\.\d+)?)\s*(?:million|millions|mil|mill|m)\b',  # 1.5 million, 1 mill
-            r'\$?([\d,]+(?:\.\d+)?)\s*(?:thousand|thousands|k)\b',     # 500k
-            r'\$?([\d,]+(?:\.\d+)?)',                        # $500,000
-        ]
-        
-        for pattern in price_patterns:
-            match = re.search(pattern, full_conversation)
+        for rx in _PRICE_RE:
+            match = rx.search(full_conversation)
             if match:
                 try:
-                    number_str = match.group(1).replace(',', '')
-                    number = float(number_str)
-                    
-                    if any(word in full_conversation for word in ['million', 'millions', 'mil', 'mill']):
-                        if number < 50:  # Assume millions if under 50
-                            number *= 1_000_000
-                    elif 'thousand' in full_conversation or 'k' in full_conversation:
-                        if number < 10_000:  # Assume thousands if under 10k
-                            number *= 1_000
-                    
-                    state["property_price"] = number
+                    # The bare-number pattern has no unit group
+                    suffix = match.group(2) if match.lastindex and match.lastindex >= 2 else None
+                    state["property_price"] = parse_amount(match.group(1), suffix)
                     break
                 except ValueError:
                     continue
     
     # Extract down payment if not already found
     if not state.get("down_payment"):
-        import re
-        # Look for down payment patterns - including "I have X saved" and "saved X"
-        dp_patterns = [
-            r'down\s+payment[:\s]+\$?([\d,]+(?:\.\d+)?)\s*(?:k|thousand)?',
-            r'\$?([\d,]+(?:\.\d+)?)\s*(?:k|thousand)?\s+down',
-            r'put\s+down\s+\$?([\d,]+(?:\.\d+)?)\s*(?:k|thousand)?',
-            r'(?:have|saved|got)\s+\$?([\d,]+(?:\.\d+)?)\s*(?:k|thousand)?\s*(?:saved)?',  # "have 300k saved" or "saved 300k"
-            r'\$?([\d,]+(?:\.\d+)?)\s*(?:k|thousand)?\s+saved',  # "300k saved"
-        ]
-        
-        for pattern in dp_patterns:
-            match = re.search(pattern, full_conversation)
+        for rx in _DP_RE:
+            match = rx.search(full_conversation)
             if match:
                 try:
-                    number_str = match.group(1).replace(',', '')
-                    number = float(number_str)
-                    
-                    # Check if it's in thousands (k or thousand mentioned)
-                    if 'k' in full_conversation or 'thousand' in full_conversation:
-                        if number < 10_000:  # If less than 10k, assume it's in thousands
-                            number *= 1_000
+                    number = parse_amount(match.group(1), match.group(2))
                     
                     # Sanity check: down payments are usually 25k-10M range
                     if 25_000 <= number <= 10_000_000:
@@ -662,10 +863,7 @@ def handle_letter_request(state: GraphState) -> GraphState:
             last_message = user_messages[-1]["content"].lower()
             
             # Check if user wants the letter
-            yes_words = ['yes', 'sure', 'okay', 'ok', 'send', 'please', 'si', 'sí']
-            no_words = ['no', 'nope', 'not', 'later', 'non', 'nein']
-            
-            if any(word in last_message for word in yes_words):
+            if _YES_RE.search(last_message):
                 # User wants the letter - check if we have email and name
                 if not state.get("user_email") or not state.get("user_name"):
                     state["messages"].append({
@@ -713,7 +911,7 @@ def handle_letter_request(state: GraphState) -> GraphState:
                     
                     state["letter_sent"] = success
                     
-            elif any(word in last_message for word in no_words):
+            elif _NO_RE.search(last_message):
                 # User declined the letter
                 state["messages"].append({
                     "role": "assistant",
@@ -723,11 +921,7 @@ def handle_letter_request(state: GraphState) -> GraphState:
                 
             elif state.get("awaiting_contact_info"):
                 # Try to extract email and name from the message
-                import re
-                
-                # Extract email
-                email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                email_match = re.search(email_pattern, last_message)
+                email_match = _EMAIL_RE.search(last_message)
                 if email_match:
                     state["user_email"] = email_match.group()
                 
@@ -802,10 +996,11 @@ Is all this information correct? (Reply "yes" to proceed or "no" to make correct
 
 def final_decision_node(state: GraphState) -> GraphState:
     """Final node that applies the rules engine and provides decision."""
-    from .rules_engine import check_preapproval, get_preapproval_details
+    from .rules_engine import get_preapproval_details
     
-    decision = check_preapproval(state)
+    # The details already include check_preapproval's decision
     details = get_preapproval_details(state)
+    decision = details["decision"]
     
     state["final_decision"] = decision
     state["conversation_complete"] = True
@@ -7,14 +7,147 @@ Generates natural, context-aware questions using OpenAI.
 Includes acknowledgments and helpful guidance.
 """
 
+import hashlib
 import os
 import re
-from typing import Dict, Any, Optional
+from collections.abc import Mapping
+from string import Template
+from typing import Dict, Any, Callable, List, NamedTuple, Optional, Union
+import httpx
+import orjson
 from openai import OpenAI
 from .business_rules import MIN_DOWN_PCT, MIN_RESERVES_MONTHS, MAX_RESERVES_MONTHS
+from .llm_cache import LLMCache
+from .llm_pool import CircuitBreaker
+from .semantic_cache import SemanticCache
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+def _build_client() -> OpenAI:
+    """
+    Build the module's OpenAI client once, on a pooled keep-alive HTTP/2
+    client so consecutive question generations reuse the TCP/TLS connection.
+    Also used by question_handler for its answers.
+    """
+    http_client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    )
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
+
+client = _build_client()
+
+# After 5 consecutive failed calls, use the static questions for 30s instead
+# of waiting on the provider's timeout every turn
+question_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Generic slot questions are templating work; the affordability and reserves
+# prompts, which restate calculated figures, stay on MODEL
+CHEAP_MODEL = os.getenv("OPENAI_CHEAP_MODEL", "gpt-4o-mini")
+
+# Estimated monthly payment per dollar borrowed: 7% interest, 30 years,
+# plus ~30% for taxes, insurance and HOA
+_MONTHLY_RATE = 0.07 / 12
+_N_PAYMENTS = 360
+_MONTHLY_PAYMENT_FACTOR = 1.3 * _MONTHLY_RATE * (1 + _MONTHLY_RATE) ** _N_PAYMENTS / ((1 + _MONTHLY_RATE) ** _N_PAYMENTS - 1)
+
+# A question is at most two short sentences (apply_tone_guard drops the rest);
+# generation also stops at the first blank line
+QUESTION_MAX_TOKENS = 60
+
+# Generated questions keyed on (slot, filled slots, last user message). Off by
+# default: at temperature 0.7 a cached question replaces a fresh sample, so
+# callers that want repeatable questions (tests, regression runs) opt in.
+CACHE_QUESTIONS = os.getenv("QUESTION_CACHE_ENABLED", "false").lower() == "true"
+question_cache = LLMCache(max_size=1024, ttl_seconds=3600)
+
+# Paraphrase cache: same slot and filled slots, and a last user message whose
+# embedding is within cosine 0.92 of an earlier one ("ok" ~ "sounds good").
+# Costs one embedding call per miss, so it is opt-in as well.
+SEMANTIC_CACHE_QUESTIONS = os.getenv("QUESTION_SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+semantic_question_cache = SemanticCache(threshold=0.92)
+
+
+class _QuestionKey(NamedTuple):
+    """The inputs a generated question depends on."""
+    slot_name: str
+    filled_slots: Mapping
+    last_user_message: Optional[str]
+
+
+def _question_cache_key(key: _QuestionKey) -> Optional[str]:
+    """Exact-match cache key for a question, or None when caching is disabled."""
+    if not CACHE_QUESTIONS:
+        return None
+    payload = orjson.dumps(
+        {"slot": key.slot_name, "filled": dict(key.filled_slots), "last": key.last_user_message},
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    )
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _semantic_bucket(key: _QuestionKey) -> Optional[str]:
+    """Semantic-cache bucket (slot + filled slots), or None when not applicable."""
+    if not SEMANTIC_CACHE_QUESTIONS or not key.last_user_message:
+        return None
+    filled = orjson.dumps(dict(key.filled_slots), option=orjson.OPT_SORT_KEYS, default=str)
+    return f"{key.slot_name}:{hashlib.blake2b(filled, digest_size=16).hexdigest()}"
+
+
+# Praise words and overly positive phrases as one word-bounded alternation, so
+# the text is scanned once. Order matters where phrases overlap ("pleased to").
+_PRAISE_PHRASES = (
+    r'great', r'excellent', r'wonderful', r'perfect', r'amazing', r'fantastic', r'outstanding', r'superb', r'brilliant',
+    r'sounds? good', r'that\'?s good', r'very good', r'good choice', r'nice', r'lovely',
+    r'congratulations', r'well done', r'good job', r'nicely done',
+    r'I\'?m excited', r'excited to', r'thrilled', r'delighted', r'pleased',
+    r'I\'?m glad', r'glad you', r'happy to', r'pleased to',
+    r'explore your options', r'break down', r'let me help', r'let\'s work',
+)
+_PRAISE_RE = re.compile(r'\b(?:' + '|'.join(_PRAISE_PHRASES) + r')\b', re.IGNORECASE)
+
+# Lowercase literals of which every praise phrase contains at least one; if
+# none occur in the text the praise regex cannot match and is skipped.
+_PRAISE_WORDS = frozenset({
+    "great", "excellent", "wonderful", "perfect", "amazing", "fantastic", "outstanding", "superb", "brilliant",
+    "good", "nice", "lovely", "congratulations", "done", "excited", "thrilled", "delighted", "pleased",
+    "glad", "happy", "explore", "break down", "let",
+})
+_EXCL_RE = re.compile(r'!+')
+_COMMAS_RE = re.compile(r'\s*,\s*,\s*')
+_PERIODS_RE = re.compile(r'\.\s*\.\s*')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+\s*')
+
+
+def _first_sentences(text: str, limit: int) -> List[str]:
+    """
+    Non-empty, stripped sentences of text (split on runs of . ! ?), scanning
+    only until limit + 1 are found so callers can tell whether there are more.
+    """
+    sentences = []
+    start = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        if text[i] in '.!?':
+            sentence = text[start:i].strip()
+            if sentence:
+                sentences.append(sentence)
+                if len(sentences) > limit:
+                    return sentences
+            while i < n and text[i] in '.!?':
+                i += 1
+            start = i
+        else:
+            i += 1
+    
+    sentence = text[start:].strip()
+    if sentence:
+        sentences.append(sentence)
+    return sentences
 
 
 def apply_tone_guard(text: str) -> str:
@@ -30,32 +163,22 @@ def apply_tone_guard(text: str) -> str:
     if not text:
         return text
     
-    # Remove praise words and overly positive phrases
-    praise_patterns = [
-        r'\b(great|excellent|wonderful|perfect|amazing|fantastic|outstanding|superb|brilliant)\b',
-        r'\b(sounds? good|that\'?s good|very good|good choice|nice|lovely)\b',
-        r'\b(congratulations|well done|good job|nicely done)\b',
-        r'\b(I\'?m excited|excited to|thrilled|delighted|pleased)\b',
-        r'\b(I\'?m glad|glad you|happy to|pleased to)\b',
-        r'\b(explore your options|break down|let me help|let\'s work)\b',
-    ]
-    
-    cleaned = text
-    for pattern in praise_patterns:
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    # Remove praise words and overly positive phrases (most replies have none)
+    lower = text.lower()
+    cleaned = _PRAISE_RE.sub('', text) if any(w in lower for w in _PRAISE_WORDS) else text
     
     # Remove excessive exclamation marks
-    cleaned = re.sub(r'!+', '.', cleaned)
+    if '!' in cleaned:
+        cleaned = _EXCL_RE.sub('.', cleaned)
     
     # Clean up extra spaces and punctuation
-    cleaned = re.sub(r'\s+', ' ', cleaned)  # Multiple spaces → single space
-    cleaned = re.sub(r'\s*,\s*,\s*', ', ', cleaned)  # Multiple commas
-    cleaned = re.sub(r'\.\s*\.\s*', '. ', cleaned)  # Multiple periods
+    cleaned = ' '.join(cleaned.split())  # Multiple spaces → single space
+    cleaned = _COMMAS_RE.sub(', ', cleaned)  # Multiple commas
+    cleaned = _PERIODS_RE.sub('. ', cleaned)  # Multiple periods
     cleaned = cleaned.strip()
     
     # Limit to 2 sentences maximum
-    sentences = re.split(r'[.!?]+\s*', cleaned)
-    sentences = [s.strip() for s in sentences if s.strip()]
+    sentences = _first_sentences(cleaned, 2)
     
     if len(sentences) > 2:
         cleaned = '. '.join(sentences[:2]) + '.'
@@ -67,29 +190,128 @@ def apply_tone_guard(text: str) -> str:
     return cleaned
 
 
-def generate_question(
-    slot_name: str,
-    state: Dict[str, Any],
-    last_user_message: Optional[str] = None
-) -> str:
+# Static questions used when the LLM is unavailable
+_FALLBACK_QUESTIONS = {
+    "down_payment": "How much do you have for a down payment?",
+    "loan_purpose": "Property use: primary residence, second home, or investment?",
+    "property_city": "Which city?",
+    "property_state": "Which state?",
+    "property_price": "Target property price?",
+    "has_valid_passport": "Do you have a valid passport?",
+    "has_valid_visa": "Do you have a valid U.S. visa?",
+    "current_location": "Are you currently in the USA or your home country?",
+    "can_demonstrate_income": "Can you provide income documentation?",
+    "has_reserves": f"Do you have {MIN_RESERVES_MONTHS}-{MAX_RESERVES_MONTHS} months of mortgage payments saved?"
+}
+
+
+# Shared instructions, sent as the first (system) message and identical on
+# every call so OpenAI's automatic prompt caching can reuse the prefix. The
+# per-call task and context follow in the user message.
+SYSTEM_GUIDE = """You are a mortgage assistant helping Foreign Nationals pre-qualify for a U.S. mortgage. Be concise and professional.
+
+STRICT GUIDELINES:
+- Maximum 2 sentences 
+- No praise words: "great", "excellent", "wonderful", "perfect"
+- Brief acknowledgment of the user's last message if relevant, then ask
+- Be direct and neutral
+- Use the dollar figures given to you exactly as written"""
+
+# Per-call user messages, parsed once; only the ${...} fields change per call
+# ("$$" is a literal dollar sign). Dynamic context comes last.
+_GENERIC_PROMPT_TMPL = Template("""Generate concise question about ${slot_name}.
+
+Context: User has provided ${context_str}
+User's last message: "${last}\"""")
+
+_PRICE_PROMPT_TMPL = Template("""Generate a response with TWO parts:
+1. One sentence stating their affordability range
+2. One question asking what price range they want
+MUST end with: "What price range are you considering?"
+
+The user has $$${down_payment} for down payment and wants an ${loan_purpose} property.
+Based on their down payment, they can afford properties between $$${comfortable_price} and $$${max_price}.
+Their last message: "${last}\"""")
+
+_RESERVES_PROMPT_TMPL = Template("""Generate a natural question that:
+1. Briefly acknowledges their previous answer
+2. Mentions how much reserves they need (the calculated range)
+3. Asks if they have that amount saved
+
+The user needs to have reserves (savings for emergencies).
+Monthly mortgage payment will be approximately $$${monthly_payment}.
+They need 6-12 months of reserves, which is $$${min_reserves} to $$${max_reserves}.
+Their last message: "${last}\"""")
+
+
+def _messages(prompt: str) -> List[Dict[str, str]]:
+    """Chat messages for a question prompt: the shared system guide, then the prompt."""
+    return [{"role": "system", "content": SYSTEM_GUIDE}, {"role": "user", "content": prompt}]
+
+
+class _QuestionRequest(NamedTuple):
+    """An LLM question generation: completion arguments plus how to finish it."""
+    kwargs: Dict[str, Any]           # chat.completions.create arguments
+    finish: Callable[[str], str]     # post-processing of the raw completion
+    fallback: str                    # static question if the call fails
+
+
+class _SlotValues(Mapping):
     """
-    Generate a natural, context-aware question for a missing slot.
-    
-    Args:
-        slot_name: The slot to ask about
-        state: Current conversation state with filled slots
-        last_user_message: User's last message for context
-    
-    Returns:
-        Natural question string with acknowledgment if appropriate
+    Read-only slot name → value view over state["slots"] (name → slot data),
+    so building a question does not copy the slots into a new dict.
     """
+    __slots__ = ("_slots",)
+
+    def __init__(self, slots: Dict[str, Any]):
+        self._slots = slots
+
+    def __getitem__(self, key: str) -> Any:
+        return self._slots[key]["value"]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+def _filled_slots(state: Dict[str, Any]) -> Mapping:
+    """Slot name → value for the slots filled so far."""
+    return _SlotValues(state.get("slots", {}))
+
+
+# Slots that appear in the context description
+_CONTEXT_SLOTS = ("down_payment", "loan_purpose", "property_city", "property_price")
+
+
+# Replies that carry no information for the next question to acknowledge
+_SHORT_CONFIRMATIONS = frozenset({
+    "ok", "okay", "yes", "yep", "yeah", "sure", "sounds good", "got it", "fine", "alright", "thanks", "thank you",
+})
+
+# Answer acknowledgment-only turns with "Got it. <static question>" instead of
+# the LLM (feature flag; off by default)
+TEMPLATE_ACK_QUESTIONS = os.getenv("QUESTION_TEMPLATE_ACKS", "false").lower() == "true"
+
+
+def _is_short_confirmation(message: Optional[str]) -> bool:
+    """True for bare confirmations like "ok", "Sure!" or "sounds good."."""
+    return bool(message) and message.strip().strip(".!").lower() in _SHORT_CONFIRMATIONS
+
+
+def _context_str(state: Dict[str, Any], filled_slots: Mapping) -> str:
+    """
+    Describe what the user has provided so far, for the generic prompt.
+    Cached on the state until one of the _CONTEXT_SLOTS values changes.
+    """
+    sig = tuple(filled_slots.get(k) for k in _CONTEXT_SLOTS)
+    if state.get("_ctx_sig") == sig:
+        return state["_ctx_str"]
     
-    # Get filled slots for context
-    filled_slots = {}
-    for key, slot_data in state.get("slots", {}).items():
-        filled_slots[key] = slot_data["value"]
-    
-    # Build context description
     context_parts = []
     if "down_payment" in filled_slots:
         context_parts.append(f"down payment of ${filled_slots['down_payment']:,.0f}")
@@ -101,49 +323,149 @@ def generate_question(
         context_parts.append(f"priced at ${filled_slots['property_price']:,.0f}")
     
     context_str = ", ".join(context_parts) if context_parts else "no information yet"
+    state["_ctx_sig"] = sig
+    state["_ctx_str"] = context_str
+    return context_str
+
+
+def _has_dedicated_prompt(slot_name: str, filled_slots: Mapping) -> bool:
+    """True for slots asked with a calculated figure (affordability, reserves)."""
+    if slot_name == "property_price":
+        return "down_payment" in filled_slots
+    if slot_name == "has_reserves":
+        return "property_price" in filled_slots
+    return False
+
+
+def _plan_question(
+    slot_name: str,
+    state: Dict[str, Any],
+    last_user_message: Optional[str]
+) -> Union[str, _QuestionRequest]:
+    """
+    Decide how to ask about slot_name: either a ready question string or the
+    LLM request that will produce it.
+    """
+    # Get filled slots for context
+    filled_slots = _filled_slots(state)
     
     # Special handling for specific slots
-    if slot_name == "property_price" and "down_payment" in filled_slots:
-        return generate_property_price_question(filled_slots, last_user_message)
+    if _has_dedicated_prompt(slot_name, filled_slots):
+        if slot_name == "property_price":
+            return _plan_property_price_question(filled_slots, last_user_message)
+        return _plan_reserves_question(filled_slots, last_user_message)
     
-    if slot_name == "has_reserves" and "property_price" in filled_slots:
-        return generate_reserves_question(filled_slots, last_user_message)
+    # Nothing to acknowledge beyond a confirmation: ask the static question
+    if TEMPLATE_ACK_QUESTIONS and slot_name in _FALLBACK_QUESTIONS and (
+        len(filled_slots) <= 1 or _is_short_confirmation(last_user_message)
+    ):
+        return f"Got it. {_FALLBACK_QUESTIONS[slot_name]}"
     
     # Generate general question with LLM
-    prompt = f"""You are a mortgage assistant. Be concise and professional.
+    prompt = _GENERIC_PROMPT_TMPL.substitute(
+        context_str=_context_str(state, filled_slots),
+        last=last_user_message or 'none',
+        slot_name=slot_name,
+    )
 
-Context: User has provided {context_str}
-User's last message: "{last_user_message or 'none'}"
+    return _QuestionRequest(
+        kwargs=dict(
+            model=CHEAP_MODEL,
+            messages=_messages(prompt),
+            temperature=0.7,
+            max_tokens=QUESTION_MAX_TOKENS,
+            stop=["\n\n"]
+        ),
+        finish=apply_tone_guard,
+        fallback=get_fallback_question(slot_name, filled_slots),
+    )
 
-STRICT GUIDELINES:
-- Maximum 2 sentences 
-- No praise words: "great", "excellent", "wonderful", "perfect"
-- Brief acknowledgment if relevant, then ask about {slot_name}
-- Be direct and neutral
 
-Generate concise question about {slot_name}:"""
+def _has_two_sentences(partial: str) -> bool:
+    """
+    True once a streamed reply holds two finished sentences as apply_tone_guard
+    counts them (after praise removal), i.e. nothing more would be kept.
+    """
+    segments = _SENTENCE_SPLIT_RE.split(_PRAISE_RE.sub('', partial))
+    # The last segment is still being generated
+    return sum(1 for seg in segments[:-1] if seg.strip()) >= 2
+
 
+def _run_question(plan: Union[str, _QuestionRequest], key: _QuestionKey) -> str:
+    """Execute a planned question with the sync client, going through the caches."""
+    if isinstance(plan, str):
+        return plan
+    if question_breaker.is_open:
+        return plan.fallback
+    
+    cache_key = _question_cache_key(key)
+    if cache_key:
+        cached = question_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    bucket = _semantic_bucket(key)
+    embedding = None
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=100
-        )
+        if bucket:
+            embedding = client.embeddings.create(model=EMBEDDING_MODEL, input=key.last_user_message).data[0].embedding
+            cached = semantic_question_cache.get(bucket, embedding)
+            if cached is not None:
+                return cached
         
-        raw_response = response.choices[0].message.content.strip()
-        return apply_tone_guard(raw_response)
-    
+        stream = client.chat.completions.create(**plan.kwargs, stream=True)
+        raw_response = ""
+        for chunk in stream:
+            if chunk.choices:
+                raw_response += chunk.choices[0].delta.content or ""
+                if _has_two_sentences(raw_response):
+                    stream.close()
+                    break
+        question = plan.finish(raw_response.strip())
     except Exception as e:
         print(f"Question generation error: {e}")
+        question_breaker.record_failure()
         # Fallback to static question
-        return get_fallback_question(slot_name, filled_slots)
+        return plan.fallback
+    
+    question_breaker.record_success()
+    if cache_key:
+        question_cache.set(cache_key, question)
+    if embedding is not None:
+        semantic_question_cache.set(bucket, embedding, question)
+    return question
 
 
-def generate_property_price_question(filled_slots: Dict[str, Any], last_user_message: Optional[str]) -> str:
+def generate_question(
+    slot_name: str,
+    state: Dict[str, Any],
+    last_user_message: Optional[str] = None
+) -> str:
+    """
+    Generate a natural, context-aware question for a missing slot.
+    
+    Args:
+        slot_name: The slot to ask about
+        state: Current conversation state with filled slots
+        last_user_message: User's last message for context
+    
+    Returns:
+        Natural question string with acknowledgment if appropriate
+    """
+    key = _QuestionKey(slot_name, _filled_slots(state), last_user_message)
+    return _run_question(_plan_question(slot_name, state, last_user_message), key)
+
+
+def generate_property_price_question(filled_slots: Mapping, last_user_message: Optional[str]) -> str:
     """
     Generate property price question with affordability calculation.
     """
+    key = _QuestionKey("property_price", filled_slots, last_user_message)
+    return _run_question(_plan_property_price_question(filled_slots, last_user_message), key)
+
+
+def _plan_property_price_question(filled_slots: Mapping, last_user_message: Optional[str]) -> Union[str, _QuestionRequest]:
+    """Plan for generate_property_price_question."""
     down_payment = filled_slots.get("down_payment", 0)
     loan_purpose = filled_slots.get("loan_purpose", "personal")
     
@@ -151,28 +473,17 @@ def generate_property_price_question(filled_slots: Dict[str, Any], last_user_mes
         # Calculate affordability using business rule constants
         max_price = down_payment / MIN_DOWN_PCT  # Use actual minimum down percentage
         comfortable_price = down_payment / 0.30  # 30% down (more comfortable)
+        fallback = f"Based on your ${down_payment:,.0f} down payment, you can afford properties between ${comfortable_price:,.0f} and ${max_price:,.0f}. What price range are you considering?"
         
-        prompt = f"""You are a mortgage assistant. The user has ${down_payment:,.0f} for down payment and wants an {loan_purpose} property.
-
-Based on their down payment, they can afford properties between ${comfortable_price:,.0f} and ${max_price:,.0f}.
-
-Their last message: "{last_user_message or 'none'}"
-
-Generate a response with TWO parts:
-1. One sentence stating their affordability range (${comfortable_price:,.0f} to ${max_price:,.0f})
-2. One question asking what price range they want
-MUST end with: "What price range are you considering?"
-
-Be direct and concise (maximum 2 sentences):"""
+        prompt = _PRICE_PROMPT_TMPL.substitute(
+            down_payment=f"{down_payment:,.0f}",
+            loan_purpose=loan_purpose,
+            comfortable_price=f"{comfortable_price:,.0f}",
+            max_price=f"{max_price:,.0f}",
+            last=last_user_message or 'none',
+        )
 
-        try:
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=100
-            )
-            raw_response = response.choices[0].message.content.strip()
+        def finish(raw_response: str) -> str:
             cleaned_response = apply_tone_guard(raw_response)
             
             # Ensure response contains a question - if not, append fallback
@@ -182,76 +493,71 @@ Be direct and concise (maximum 2 sentences):"""
                 cleaned_response += " What price range are you considering?"
             
             return cleaned_response
-        except:
-            return f"Based on your ${down_payment:,.0f} down payment, you can afford properties between ${comfortable_price:,.0f} and ${max_price:,.0f}. What price range are you considering?"
+
+        return _QuestionRequest(
+            kwargs=dict(
+                model=MODEL,
+                messages=_messages(prompt),
+                temperature=0.7,
+                max_tokens=QUESTION_MAX_TOKENS,
+                stop=["\n\n"]
+            ),
+            finish=finish,
+            fallback=fallback,
+        )
     
     return "What's your target property price?"
 
 
-def generate_reserves_question(filled_slots: Dict[str, Any], last_user_message: Optional[str]) -> str:
+def generate_reserves_question(filled_slots: Mapping, last_user_message: Optional[str]) -> str:
     """
     Generate reserves question with calculated amount.
     """
+    key = _QuestionKey("has_reserves", filled_slots, last_user_message)
+    return _run_question(_plan_reserves_question(filled_slots, last_user_message), key)
+
+
+def _plan_reserves_question(filled_slots: Mapping, last_user_message: Optional[str]) -> Union[str, _QuestionRequest]:
+    """Plan for generate_reserves_question."""
     property_price = filled_slots.get("property_price", 0)
     down_payment = filled_slots.get("down_payment", 0)
     
     if property_price > 0 and down_payment > 0:
         # Calculate monthly mortgage payment (rough estimate)
         loan_amount = property_price - down_payment
-        # Assume 7% interest, 30 years, plus taxes/insurance
-        monthly_rate = 0.07 / 12
-        n_payments = 360
-        monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**n_payments) / ((1 + monthly_rate)**n_payments - 1)
-        monthly_payment *= 1.3  # Add ~30% for taxes, insurance, HOA
+        if loan_amount <= 0:
+            # Nothing to finance, so no payment figure to quote
+            return f"Do you have {MIN_RESERVES_MONTHS}-{MAX_RESERVES_MONTHS} months of mortgage payments saved as reserves?"
+        monthly_payment = loan_amount * _MONTHLY_PAYMENT_FACTOR
         
         # Use business rule constants for reserves
         min_reserves = monthly_payment * MIN_RESERVES_MONTHS
         max_reserves = monthly_payment * MAX_RESERVES_MONTHS
         
-        prompt = f"""You are a mortgage assistant. The user needs to have reserves (savings for emergencies).
-
-Monthly mortgage payment will be approximately ${monthly_payment:,.0f}.
-They need 6-12 months of reserves, which is ${min_reserves:,.0f} to ${max_reserves:,.0f}.
-
-Their last message: "{last_user_message or 'none'}"
-
-Generate a natural question that:
-1. Briefly acknowledges their previous answer
-2. Mentions how much reserves they need (the calculated range)
-3. Asks if they have that amount saved
-
-Keep it brief and helpful (2-3 sentences max):"""
+        prompt = _RESERVES_PROMPT_TMPL.substitute(
+            monthly_payment=f"{monthly_payment:,.0f}",
+            min_reserves=f"{min_reserves:,.0f}",
+            max_reserves=f"{max_reserves:,.0f}",
+            last=last_user_message or 'none',
+        )
 
-        try:
-            response = client.chat.completions.create(
+        return _QuestionRequest(
+            kwargs=dict(
                 model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
+                messages=_messages(prompt),
                 temperature=0.7,
-                max_tokens=120
-            )
-            raw_response = response.choices[0].message.content.strip()
-            return apply_tone_guard(raw_response)
-        except:
-            return f"You'll need {MIN_RESERVES_MONTHS}-{MAX_RESERVES_MONTHS} months of reserves (approximately ${min_reserves:,.0f} to ${max_reserves:,.0f}). Do you have this amount saved?"
+                max_tokens=QUESTION_MAX_TOKENS,
+                stop=["\n\n"]
+            ),
+            finish=apply_tone_guard,
+            fallback=f"You'll need {MIN_RESERVES_MONTHS}-{MAX_RESERVES_MONTHS} months of reserves (approximately ${min_reserves:,.0f} to ${max_reserves:,.0f}). Do you have this amount saved?",
+        )
     
     return f"Do you have {MIN_RESERVES_MONTHS}-{MAX_RESERVES_MONTHS} months of mortgage payments saved as reserves?"
 
 
-def get_fallback_question(slot_name: str, filled_slots: Dict[str, Any]) -> str:
+def get_fallback_question(slot_name: str, filled_slots: Mapping) -> str:
     """
     Fallback static questions if LLM fails.
     """
-    questions = {
-        "down_payment": "How much do you have for a down payment?",
-        "loan_purpose": "Property use: primary residence, second home, or investment?",
-        "property_city": "Which city?",
-        "property_state": "Which state?", 
-        "property_price": "Target property price?",
-        "has_valid_passport": "Do you have a valid passport?",
-        "has_valid_visa": "Do you have a valid U.S. visa?",
-        "current_location": "Are you currently in the USA or your home country?",
-        "can_demonstrate_income": "Can you provide income documentation?",
-        "has_reserves": f"Do you have {MIN_RESERVES_MONTHS}-{MAX_RESERVES_MONTHS} months of mortgage payments saved?"
-    }
-    
-    return questions.get(slot_name, f"Could you tell me about your {slot_name}?")
\ No newline at end of file
+    return _FALLBACK_QUESTIONS.get(slot_name, f"Could you tell me about your {slot_name}?")
\ No newline at end of file
@@ -7,13 +7,158 @@ Handles user questions at any point in the conversation.
 Provides helpful answers then guides back to pending question.
 """
 
+import logging
 import os
-from typing import Optional, Dict, Any
-from openai import OpenAI
-from .question_generator import apply_tone_guard
+import re
+import time
+from typing import Optional, Dict, Any, NamedTuple, Union
+from openai import APIConnectionError, APIError
+from .llm_cache import LLMCache
+# Shared with question generation: one pooled HTTP/2 connection per process
+from .question_generator import apply_tone_guard, client
+from .slot_state import get_slot_value
+
+logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# A dropped connection or timeout gets one quick retry; other provider errors
+# (auth, bad request, rate limit) go straight to the static fallback
+_ANSWER_ATTEMPTS = 2
+_RETRY_DELAY_SECONDS = 0.2
+
+# LLM answers to off-topic questions keyed on (context, normalized question).
+# The same FAQs ("what credit score do I need?") come up across conversations,
+# and a repeated answer is fine there, so unlike the question cache it is on
+# by default. Stored before the transition, which depends on the pending slot.
+CACHE_ANSWERS = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+answer_cache = LLMCache(max_size=1024, ttl_seconds=3600)
+
+# Estimated monthly payment per dollar borrowed: 7% interest, 30 years,
+# plus ~30% for taxes and insurance
+_MONTHLY_RATE = 0.07 / 12
+_N_PAYMENTS = 360
+_MONTHLY_PAYMENT_FACTOR = 1.3 * _MONTHLY_RATE * (1 + _MONTHLY_RATE) ** _N_PAYMENTS / ((1 + _MONTHLY_RATE) ** _N_PAYMENTS - 1)
+
+# Property price mentioned in an affordability question, most specific first:
+# "1.5 million" / "1.5m", "800k", "$750,000", bare "750000"
+_MILLION_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(?:million|mill?|mm|m)\b')
+_THOUSAND_RE = re.compile(r'(\d+(?:\.\d+)?)\s*k\b')
+_DOLLAR_RE = re.compile(r'\$\s*(\d+(?:,\d{3})*(?:\.\d+)?)')
+_BARE_RE = re.compile(r'\b(\d{6,})\b')
+
+# A question word as a whole space-separated word ("what", "can i", ...), or a
+# help/explanation phrase anywhere in the message
+_QUESTION_RE = re.compile(
+    r"(?<![^ ])(?:what|how|why|when|where|which|who|whom"
+    r"|can i|could i|should i|would i|may i"
+    r"|do i|does|is it|are there|will i|am i)(?![^ ])"
+    r"|help|explain|tell me|show me|describe"
+    r"|i don'?t understand|confused|what (?:does|is|are)"
+)
+
+# Every keyword the topic branches of handle_user_question test for. One scan
+# finds all of them, overlapping ones included ("rate" inside "demonstrate",
+# "how" inside "show"); a lookahead matches at each position, so only keywords
+# sharing a start with a longer one need the prefix table below.
+_TOPIC_KEYWORDS = (
+    "income", "document", "demonstrate", "proof", "verify",
+    "how much", "how long", "how", "what", "which", "show", "need",
+    "reserves", "closing", "cost", "rate", "interest",
+    "timeline", "process", "takes", "down payment", "afford",
+)
+_TOPIC_RE = re.compile("(?=(" + "|".join(map(re.escape, _TOPIC_KEYWORDS)) + "))")
+_TOPIC_PREFIXES = {"how much": "how", "how long": "how"}
+
+# Keyword groups for the topic branches, tested against the hit set
+_INCOME_TERMS = frozenset(("income", "document", "demonstrate", "proof", "verify"))
+_INCOME_QWORDS = frozenset(("how", "what", "which", "show", "need"))
+_RATE_TERMS = frozenset(("rate", "interest"))
+_TIMELINE_TERMS = frozenset(("how long", "timeline", "process", "takes"))
+_DOWN_PAYMENT_TERMS = frozenset(("down payment", "afford"))
+
+# Static answers for the common topics. All are longer than the
+# get_smart_transition threshold, so they are returned without a reminder.
+_ANSWER_INCOME = """To demonstrate income for a Foreign National loan, you can provide:
+
+• **International bank statements** (last 3-6 months)
+• **CPA letter** from a certified accountant in your home country
+• **Tax returns** from your country of origin (last 2 years)
+• **Employment verification letter** on company letterhead
+• **Business financial statements** if self-employed
+• **Rental income documentation** if applicable
+
+Most lenders require proof of 2 years of stable income."""
+
+_ANSWER_CLOSING_COSTS = """Closing costs typically include:
+
+• Loan origination fee: 1-2% of loan amount
+• Appraisal fee: $500-$800
+• Title insurance: 0.5-1% of purchase price
+• Attorney fees: $1,000-$2,000
+• Escrow/recording fees: $500-$1,000
+
+**Total: Usually 2-5% of loan amount**
+
+Example: On a $700k loan, expect $14k-$35k in closing costs."""
+
+_ANSWER_RATES = """Current interest rates for Foreign National loans:
+
+• Investment properties: 7.5-9%
+• Primary residence: 7-8.5%
+• Second home: 7.25-8.75%
+
+Rates depend on:
+• Down payment amount (higher = better rate)
+• Credit profile
+• Property type and location
+• Loan amount"""
+
+_ANSWER_TIMELINE = """The mortgage process timeline:
+
+• **Pre-qualification** (now): Immediate
+• **Full application**: 2-3 days
+• **Document review**: 5-7 days
+• **Underwriting**: 2-3 weeks
+• **Appraisal**: 1-2 weeks
+• **Closing**: 30-45 days total
+
+Foreign National loans may take slightly longer due to international documentation."""
+
+_ANSWER_DOWN_PAYMENT_GENERAL = """Minimum down payment requirements for Foreign National loans:
+
+• **Primary residence**: 25% minimum
+• **Second home**: 25% minimum
+• **Investment property**: 25% minimum
+
+Higher down payments (30%+) may qualify for better interest rates and easier approval."""
+
+
+def _topic_hits(msg_lower: str) -> set:
+    """Topic keywords contained in the (lowercased) message."""
+    hits = set(_TOPIC_RE.findall(msg_lower))
+    for keyword, prefix in _TOPIC_PREFIXES.items():
+        if keyword in hits:
+            hits.add(prefix)
+    return hits
+
+# Short reminder of the pending question for each slot, appended after an answer
+_REMINDERS = {
+    "down_payment": "How much do you have saved for a down payment?",
+    "loan_purpose": "What will you use the property for?",
+    "property_city": "Which city is the property in?",
+    "property_state": "Which state is that in?",
+    "property_price": "What price range are you considering?",
+    "has_valid_passport": "Do you have a valid passport?",
+    "has_valid_visa": "Do you have a valid U.S. visa?",
+    "current_location": "Where are you currently located?",
+    "can_demonstrate_income": "Can you provide income documentation?",
+    "has_reserves": "Do you have the required reserves saved?",
+}
+
+
+def _is_trivial_message(message: str) -> bool:
+    """Too short or without any letters (e.g. "??", "..", an emoji) to answer."""
+    return len(message.strip()) < 3 or not any(c.isalpha() for c in message)
 
 
 def is_user_asking_question(message: str) -> bool:
@@ -23,34 +168,14 @@ def is_user_asking_question(message: str) -> bool:
     Returns True if the message appears to be a question.
     """
     
-    msg_lower = message.lower().strip()
+    if _is_trivial_message(message):
+        return False
     
     # Explicit question marks
     if "?" in message:
         return True
     
-    # Question words at start or middle
-    question_words = [
-        "what", "how", "why", "when", "where", "which", "who", "whom",
-        "can i", "could i", "should i", "would i", "may i",
-        "do i", "does", "is it", "are there", "will i", "am i"
-    ]
-    
-    for word in question_words:
-        if msg_lower.startswith(word + " ") or f" {word} " in f" {msg_lower} ":
-            return True
-    
-    # Help/explanation requests
-    help_phrases = [
-        "help", "explain", "tell me", "show me", "describe",
-        "i don't understand", "i dont understand", "confused",
-        "what does", "what is", "what are"
-    ]
-    
-    if any(phrase in msg_lower for phrase in help_phrases):
-        return True
-    
-    return False
+    return _QUESTION_RE.search(message.lower().strip()) is not None
 
 
 def get_smart_transition(answer: str, state: Dict[str, Any]) -> str:
@@ -72,70 +197,60 @@ def get_smart_transition(answer: str, state: Dict[str, Any]) -> str:
     if answer.strip().endswith('?'):
         return answer
     
-    # Simple reminders for each slot with transition
-    reminders = {
-        "down_payment": "How much do you have saved for a down payment?",
-        "loan_purpose": "What will you use the property for?", 
-        "property_city": "Which city is the property in?",
-        "property_state": "Which state is that in?",
-        "property_price": "What price range are you considering?",
-        "has_valid_passport": "Do you have a valid passport?",
-        "has_valid_visa": "Do you have a valid U.S. visa?",
-        "current_location": "Where are you currently located?",
-        "can_demonstrate_income": "Can you provide income documentation?",
-        "has_reserves": "Do you have the required reserves saved?"
-    }
-    
-    reminder = reminders.get(last_asked, f"Could you answer about {last_asked}?")
+    reminder = _REMINDERS.get(last_asked) or f"Could you answer about {last_asked}?"
     
     # Use softer transition
     return f"{answer}\n\nBy the way, {reminder}"
 
 
+class _AnswerRequest(NamedTuple):
+    """An answer that needs an LLM call, planned but not yet executed."""
+    prompt: str
+    max_tokens: int
+    fallback: str                     # static answer if the call fails
+    cache_key: Optional[str] = None   # answer_cache key, if the answer is reusable
+
+
 def handle_user_question(user_msg: str, state: Dict[str, Any]) -> Optional[str]:
     """
     Handle user questions with context-aware answers.
     
     Returns answer + reminder about pending question, or None if can't handle.
     """
-    
+    if _is_trivial_message(user_msg):
+        return None
+    return _run_answer(_plan_answer(user_msg, state), state)
+
+
+def _plan_answer(user_msg: str, state: Dict[str, Any]) -> Union[str, _AnswerRequest]:
+    """
+    Pick the answer for a user question: a finished string for the static
+    topics, or an _AnswerRequest when the answer needs the LLM.
+    """
     msg_lower = user_msg.lower()
+    hits = _topic_hits(msg_lower)
+    if not hits:
+        # No topic keyword at all: none of the branches below can match
+        return _plan_llm_answer(user_msg, state)
     
     # =========================================================================
     # INCOME DOCUMENTATION QUESTIONS
     # =========================================================================
-    if any(term in msg_lower for term in ["income", "document", "demonstrate", "proof", "verify"]):
-        if any(q in msg_lower for q in ["how", "what", "which", "show", "need"]):
-            answer = """To demonstrate income for a Foreign National loan, you can provide:
-
-• **International bank statements** (last 3-6 months)
-• **CPA letter** from a certified accountant in your home country
-• **Tax returns** from your country of origin (last 2 years)
-• **Employment verification letter** on company letterhead
-• **Business financial statements** if self-employed
-• **Rental income documentation** if applicable
-
-Most lenders require proof of 2 years of stable income."""
-            
-            # Add smart transition back to pending question
-            return get_smart_transition(answer, state)
+    if not hits.isdisjoint(_INCOME_TERMS):
+        if not hits.isdisjoint(_INCOME_QWORDS):
+            return _ANSWER_INCOME
     
     # =========================================================================
     # RESERVES CALCULATION
     # =========================================================================
-    if "reserves" in msg_lower or ("how much" in msg_lower and state.get("last_slot_asked") == "has_reserves"):
-        from .slot_state import get_slot_value
-        
+    if "reserves" in hits or ("how much" in hits and state.get("last_slot_asked") == "has_reserves"):
         property_price = get_slot_value(state, "property_price")
         down_payment = get_slot_value(state, "down_payment")
         
         if property_price and down_payment:
             # Calculate monthly payment
             loan_amount = property_price - down_payment
-            monthly_rate = 0.07 / 12
-            n_payments = 360
-            monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**n_payments) / ((1 + monthly_rate)**n_payments - 1)
-            monthly_payment *= 1.3  # Add taxes, insurance
+            monthly_payment = loan_amount * _MONTHLY_PAYMENT_FACTOR
             
             min_reserves = monthly_payment * 6
             max_reserves = monthly_payment * 12
@@ -148,93 +263,55 @@ For reserves, you'll need **6-12 months** of mortgage payments saved:
 
 This ensures you can cover payments if income is interrupted."""
             
-            return get_smart_transition(answer, state)
+            return answer
     
     # =========================================================================
     # CLOSING COSTS
     # =========================================================================
-    if "closing" in msg_lower and "cost" in msg_lower:
-        answer = """Closing costs typically include:
-
-• Loan origination fee: 1-2% of loan amount
-• Appraisal fee: $500-$800
-• Title insurance: 0.5-1% of purchase price
-• Attorney fees: $1,000-$2,000
-• Escrow/recording fees: $500-$1,000
-
-**Total: Usually 2-5% of loan amount**
-
-Example: On a $700k loan, expect $14k-$35k in closing costs."""
-        
-        return get_smart_transition(answer, state)
+    if "closing" in hits and "cost" in hits:
+        return _ANSWER_CLOSING_COSTS
     
     # =========================================================================
     # INTEREST RATES
     # =========================================================================
-    if "rate" in msg_lower or "interest" in msg_lower:
-        answer = """Current interest rates for Foreign National loans:
-
-• Investment properties: 7.5-9%
-• Primary residence: 7-8.5%
-• Second home: 7.25-8.75%
-
-Rates depend on:
-• Down payment amount (higher = better rate)
-• Credit profile
-• Property type and location
-• Loan amount"""
-        
-        return get_smart_transition(answer, state)
+    if not hits.isdisjoint(_RATE_TERMS):
+        return _ANSWER_RATES
     
     # =========================================================================
     # PROCESS TIMELINE
     # =========================================================================
-    if any(term in msg_lower for term in ["how long", "timeline", "process", "takes"]):
-        answer = """The mortgage process timeline:
-
-• **Pre-qualification** (now): Immediate
-• **Full application**: 2-3 days
-• **Document review**: 5-7 days
-• **Underwriting**: 2-3 weeks
-• **Appraisal**: 1-2 weeks
-• **Closing**: 30-45 days total
-
-Foreign National loans may take slightly longer due to international documentation."""
-        
-        return get_smart_transition(answer, state)
+    if not hits.isdisjoint(_TIMELINE_TERMS):
+        return _ANSWER_TIMELINE
     
     # =========================================================================
     # DOWN PAYMENT CALCULATION
     # =========================================================================
-    if "down payment" in msg_lower or "afford" in msg_lower:
-        from .slot_state import get_slot_value
-        import re
-        
+    if not hits.isdisjoint(_DOWN_PAYMENT_TERMS):
         # Check if user is asking about a specific property price
         # Extract price from message like "$1.5 million" or "1.5m"
         price_mentioned = None
         
         # Try to extract price from message
         # Check for millions first (most specific)
-        million_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:million|mill?|mm|m)\b', msg_lower)
+        million_match = _MILLION_RE.search(msg_lower)
         if million_match:
             num = float(million_match.group(1))
             price_mentioned = num * 1000000
         else:
             # Check for thousands
-            thousand_match = re.search(r'(\d+(?:\.\d+)?)\s*k\b', msg_lower)
+            thousand_match = _THOUSAND_RE.search(msg_lower)
             if thousand_match:
                 num = float(thousand_match.group(1))
                 price_mentioned = num * 1000
             else:
                 # Check for dollar amounts
-                dollar_match = re.search(r'\$\s*(\d+(?:,\d{3})*(?:\.\d+)?)', msg_lower)
+                dollar_match = _DOLLAR_RE.search(msg_lower)
                 if dollar_match:
                     num_str = dollar_match.group(1).replace(',', '')
                     price_mentioned = float(num_str)
                 else:
                     # Check for bare numbers (6+ digits)
-                    bare_match = re.search(r'\b(\d{6,})\b', msg_lower)
+                    bare_match = _BARE_RE.search(msg_lower)
                     if bare_match:
                         price_mentioned = float(bare_match.group(1))
         
@@ -262,52 +339,20 @@ Facts to state:
 
 State these facts in 1-2 sentences. Be direct. No greetings or options lists."""
 
-                try:
-                    response = client.chat.completions.create(
-                        model=MODEL,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7,
-                        max_tokens=80
-                    )
-                    raw_answer = response.choices[0].message.content.strip()
-                    answer = apply_tone_guard(raw_answer)
-                except:
-                    # Fallback if LLM fails
-                    answer = f"To afford a ${price_mentioned:,.0f} property with a {int(min_down_pct*100)}% down payment, you'll need ${required_down:,.0f}. You currently have ${current_down_float:,.0f}, so you would need an additional ${difference:,.0f}. Alternatively, with your current down payment, you can afford properties up to ${current_down_float/min_down_pct:,.0f}."
+                # LLM phrasing, with a static fallback if the call fails
+                return _AnswerRequest(prompt, 80, f"To afford a ${price_mentioned:,.0f} property with a {int(min_down_pct*100)}% down payment, you'll need ${required_down:,.0f}. You currently have ${current_down_float:,.0f}, so you would need an additional ${difference:,.0f}. Alternatively, with your current down payment, you can afford properties up to ${current_down_float/min_down_pct:,.0f}.")
             else:
-                # Generate positive response with LLM
-                prompt = f"""You are a mortgage advisor. The user asked about affording a ${price_mentioned:,.0f} property.
-
-Facts to state:
-- They have ${current_down_float:,.0f} saved
-- That's {(current_down_float/price_mentioned)*100:.1f}% down payment
-- This exceeds the {int(min_down_pct*100)}% minimum requirement
-- They may qualify for better rates
-
-State these facts in 1-2 sentences. Be direct and professional."""
-
-                try:
-                    response = client.chat.completions.create(
-                        model=MODEL,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7,
-                        max_tokens=80
-                    )
-                    raw_answer = response.choices[0].message.content.strip()
-                    answer = apply_tone_guard(raw_answer)
-                except:
-                    # Fallback if LLM fails
-                    answer = f"Great news! With your ${current_down_float:,.0f} down payment, you can definitely afford a ${price_mentioned:,.0f} property. That's a {(current_down_float/price_mentioned)*100:.1f}% down payment, which exceeds the {int(min_down_pct*100)}% minimum and may qualify you for better rates!"
+                # Already above the minimum: the figures say it all, no LLM call
+                return f"Great news! With your ${current_down_float:,.0f} down payment, you can definitely afford a ${price_mentioned:,.0f} property. That's a {(current_down_float/price_mentioned)*100:.1f}% down payment, which exceeds the {int(min_down_pct*100)}% minimum and may qualify you for better rates!"
         
         elif current_down:
             # Generic down payment info with user's context
-            loan_purpose = get_slot_value(state, "loan_purpose") or "personal"
-            
             # Foreign National loans require 25% minimum down for ALL purposes
             min_pct = 25
-            max_affordable = float(current_down) * 4  # 25% down = 4x affordability
+            current_down_float = float(current_down)
+            max_affordable = current_down_float * 4  # 25% down = 4x affordability
             
-            answer = f"""With your **${float(current_down):,.0f}** down payment:
+            answer = f"""With your **${current_down_float:,.0f}** down payment:
 
 • Minimum required: **{min_pct}%** for {loan_purpose} property
 • Maximum affordable: **${max_affordable:,.0f}** property
@@ -317,37 +362,37 @@ Higher down payments (30%+) may qualify for better rates and easier approval."""
         
         else:
             # No context, provide general info
-            answer = """Minimum down payment requirements for Foreign National loans:
-
-• **Primary residence**: 25% minimum
-• **Second home**: 25% minimum
-• **Investment property**: 25% minimum
-
-Higher down payments (30%+) may qualify for better interest rates and easier approval."""
+            answer = _ANSWER_DOWN_PAYMENT_GENERAL
         
-        return get_smart_transition(answer, state)
+        return answer
     
     # =========================================================================
     # USE LLM FOR OTHER QUESTIONS
     # =========================================================================
-    return generate_answer_with_llm(user_msg, state)
+    return _plan_llm_answer(user_msg, state)
 
 
 def generate_answer_with_llm(user_msg: str, state: Dict[str, Any]) -> str:
     """
     Use LLM to generate answers for questions not in knowledge base.
     """
-    
+    return _run_answer(_plan_llm_answer(user_msg, state), state)
+
+
+def _plan_llm_answer(user_msg: str, state: Dict[str, Any]) -> _AnswerRequest:
+    """Prompt for a question outside the static topics."""
     # Build context from state
-    from .slot_state import get_slot_value
+    down_payment = get_slot_value(state, "down_payment")
+    loan_purpose = get_slot_value(state, "loan_purpose")
+    property_city = get_slot_value(state, "property_city")
     
     context_parts = []
-    if get_slot_value(state, "down_payment"):
-        context_parts.append(f"User has ${get_slot_value(state, 'down_payment'):,.0f} for down payment")
-    if get_slot_value(state, "loan_purpose"):
-        context_parts.append(f"Looking for {get_slot_value(state, 'loan_purpose')} property")
-    if get_slot_value(state, "property_city"):
-        context_parts.append(f"Property in {get_slot_value(state, 'property_city')}")
+    if down_payment:
+        context_parts.append(f"User has ${down_payment:,.0f} for down payment")
+    if loan_purpose:
+        context_parts.append(f"Looking for {loan_purpose} property")
+    if property_city:
+        context_parts.append(f"Property in {property_city}")
     
     context = "; ".join(context_parts) if context_parts else "Starting pre-qualification"
     
@@ -360,24 +405,51 @@ User's question: "{user_msg}"
 Provide a helpful, concise answer (2-4 sentences). Focus on Foreign National loan requirements.
 Be professional but friendly. Don't make promises about approval."""
 
-    try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=200
-        )
-        
-        raw_answer = response.choices[0].message.content.strip()
-        answer = apply_tone_guard(raw_answer)
-        
-        # Add smart transition back to pending question
-        return get_smart_transition(answer, state)
+    # Fallback response
+    fallback = "I understand you have a question. Let me help you complete the pre-qualification first, then I can address that in detail."
+    cache_key = f"{context}\n{user_msg.lower().strip()}" if CACHE_ANSWERS else None
+    return _AnswerRequest(prompt, 200, fallback, cache_key)
+
+
+def _create_answer(plan: _AnswerRequest) -> Optional[str]:
+    """Call the model for a planned answer; None if the call fails or returns no text."""
+    for attempt in range(1, _ANSWER_ATTEMPTS + 1):
+        try:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": plan.prompt}],
+                temperature=0.7,
+                max_tokens=plan.max_tokens
+            )
+        except APIConnectionError:  # includes APITimeoutError
+            if attempt == _ANSWER_ATTEMPTS:
+                logger.exception("LLM answer generation error")
+                return None
+            time.sleep(_RETRY_DELAY_SECONDS * attempt)
+        except APIError:
+            logger.exception("LLM answer generation error")
+            return None
+        else:
+            content = response.choices[0].message.content
+            # A refusal or content-filtered reply comes back without text
+            if not content or not content.strip():
+                logger.warning("LLM answer generation returned no content")
+                return None
+            return apply_tone_guard(content.strip())
+
+
+def _run_answer(plan: Union[str, _AnswerRequest], state: Dict[str, Any]) -> str:
+    """Execute a planned answer, adding the transition back to the pending question."""
+    if isinstance(plan, str):
+        return get_smart_transition(plan, state)
     
-    except Exception as e:
-        print(f"LLM answer generation error: {e}")
-        
-        # Fallback response
-        answer = "I understand you have a question. Let me help you complete the pre-qualification first, then I can address that in detail."
-        
-        return get_smart_transition(answer, state)
\ No newline at end of file
+    answer = answer_cache.get(plan.cache_key) if plan.cache_key else None
+    if answer is None:
+        answer = _create_answer(plan)
+        if answer is None:
+            answer = plan.fallback
+        elif plan.cache_key:
+            answer_cache.set(plan.cache_key, answer)
+    
+    # Add smart transition back to pending question
+    return get_smart_transition(answer, state)
@@ -37,10 +37,15 @@ DECISION LOGIC:
 USAGE FLOW:
 All Q1-Q8 answered → Verification confirmed → check_preapproval(state) → Decision
 """
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
+from .business_rules import PURPOSE_ALLOWED
 from .state import GraphState
 
 
+# Types the calculations accept for prices and amounts (bool is an int too)
+_NUMBER = (int, float)
+
+
 # ============================================================================
 # MAIN DECISION FUNCTION
 # ============================================================================
@@ -111,22 +116,73 @@ def check_preapproval(state: GraphState) -> str:
         down_payment: 100000
         → Result: "Needs Review"
     """
+    g = state.get
+    property_price = g("property_price", 0)
+    down_payment = g("down_payment", 0)
+    ltv_ratio = calculate_ltv_ratio(property_price, down_payment)
+    return _decide(g, property_price, down_payment, ltv_ratio)
+
+
+def _evaluate(state: GraphState) -> Tuple[str, dict]:
+    """
+    Read the state and compute the ratios once, for both the decision and
+    the details report. check_preapproval only needs the LTV and calls
+    _decide directly.
+    
+    Returns:
+        (decision, metrics) where metrics holds every get_preapproval_details
+        field except "decision"
+    """
+    g = state.get
+    property_price = g("property_price", 0)
+    down_payment = g("down_payment", 0)
+    
+    # Calculate ratios
+    ltv_ratio = calculate_ltv_ratio(property_price, down_payment)
+    down_payment_pct = calculate_down_payment_percentage(property_price, down_payment)
+    
+    # Calculate loan amount and check requirements
+    if isinstance(property_price, _NUMBER) and isinstance(down_payment, _NUMBER):
+        meets_ltv = ltv_ratio <= 0.75  # Maximum 75% LTV
+        meets_down_payment = down_payment_pct >= 0.25  # Minimum 25% down
+        loan_amount = property_price - down_payment
+    else:
+        meets_ltv = False
+        meets_down_payment = False
+        loan_amount = 0
     
+    metrics = {
+        # ===== Financial Details =====
+        "property_price": property_price or 0,
+        "down_payment": down_payment or 0,
+        "down_payment_percentage": down_payment_pct * 100,  # Convert to percentage
+        "ltv_ratio": ltv_ratio * 100,  # Convert to percentage
+        "loan_amount": loan_amount,
+        
+        # ===== Requirement Checks =====
+        "meets_ltv_requirement": meets_ltv,
+        "meets_down_payment_requirement": meets_down_payment,
+        "has_documentation": g("has_valid_passport") and g("has_valid_visa"),
+        "has_income_proof": g("can_demonstrate_income"),
+        "has_reserves": g("has_reserves"),
+    }
+    return _decide(g, property_price, down_payment, ltv_ratio), metrics
+
+
+def _decide(g: Callable, property_price: Any, down_payment: Any, ltv_ratio: float) -> str:
+    """Run the checks documented on check_preapproval, in order."""
     # -------------------------------------------------------------------------
     # CHECK 1: DOCUMENTATION (Passport AND Visa required)
     # -------------------------------------------------------------------------
     # Foreign Nationals MUST have both valid passport and valid visa
     # Rejecting immediately if either is missing saves processing time
-    if not state.get("has_valid_passport") or not state.get("has_valid_visa"):
+    if not g("has_valid_passport") or not g("has_valid_visa"):
         return "Rejected"
     
     # -------------------------------------------------------------------------
     # CHECK 2: PROPERTY PRICE AND DOWN PAYMENT EXIST
     # -------------------------------------------------------------------------
     # Need both values to calculate LTV and down payment percentage
-    property_price = state.get("property_price")
-    down_payment = state.get("down_payment")
-    
     if not property_price or not down_payment:
         # Missing critical financial data - cannot make decision
         return "Needs Review"
@@ -136,12 +192,15 @@ def check_preapproval(state: GraphState) -> str:
     # -------------------------------------------------------------------------
     # Property price and down payment must be positive numbers
     # Zero or negative values indicate data error
-    try:
-        if property_price <= 0 or down_payment <= 0:
-            return "Rejected"
-    except (TypeError, ValueError):
-        # Data type error (e.g., string instead of number)
+    # A data type error (e.g., string instead of number) needs review
+    if not isinstance(property_price, _NUMBER):
+        return "Needs Review"
+    if property_price <= 0:
+        return "Rejected"
+    if not isinstance(down_payment, _NUMBER):
         return "Needs Review"
+    if down_payment <= 0:
+        return "Rejected"
     
     # -------------------------------------------------------------------------
     # CHECK 4: LTV (LOAN-TO-VALUE) CALCULATION
@@ -156,22 +215,18 @@ def check_preapproval(state: GraphState) -> str:
     #
     # Maximum allowed LTV: 75%
     # If LTV > 75%, the down payment is insufficient
-    try:
-        ltv_ratio = (property_price - down_payment) / property_price
-        
-        # Maximum 75% LTV means minimum 25% down payment
-        if ltv_ratio > 0.75:
-            return "Rejected"
-    except (TypeError, ValueError, ZeroDivisionError):
-        # Calculation error - cannot make decision
-        return "Needs Review"
+    # (ltv_ratio was computed by the caller from these same validated values)
+    #
+    # Maximum 75% LTV means minimum 25% down payment
+    if ltv_ratio > 0.75:
+        return "Rejected"
     
     # -------------------------------------------------------------------------
     # CHECK 5: CASH RESERVES (6-12 months savings)
     # -------------------------------------------------------------------------
     # Applicant must have saved cash to cover mortgage payments if income stops
     # This shows financial stability and reduces lender risk
-    if not state.get("has_reserves"):
+    if not g("has_reserves"):
         return "Rejected"
     
     # -------------------------------------------------------------------------
@@ -179,7 +234,7 @@ def check_preapproval(state: GraphState) -> str:
     # -------------------------------------------------------------------------
     # Must be able to prove income with bank statements, tax returns, etc.
     # Without income documentation, we cannot verify ability to repay
-    if not state.get("can_demonstrate_income"):
+    if not g("can_demonstrate_income"):
         return "Rejected"
     
     # -------------------------------------------------------------------------
@@ -195,8 +250,7 @@ def check_preapproval(state: GraphState) -> str:
     #
     # NOTE: "primary residence" is NOT a valid value!
     # graph.py should have normalized it to "personal"
-    loan_purpose = state.get("loan_purpose")
-    if not loan_purpose or loan_purpose not in ["personal", "second", "investment"]:
+    if g("loan_purpose") not in PURPOSE_ALLOWED:
         # Invalid or missing loan purpose - cannot make decision
         return "Needs Review"
     
@@ -238,12 +292,10 @@ def calculate_ltv_ratio(property_price: float, down_payment: float) -> float:
     Returns:
         LTV as decimal (0.75 = 75%), or 0.0 if calculation fails
     """
-    try:
-        if property_price <= 0:
-            return 0.0
-        return (property_price - down_payment) / property_price
-    except (TypeError, ValueError, ZeroDivisionError):
+    if not (isinstance(property_price, _NUMBER) and isinstance(down_payment, _NUMBER)) or property_price <= 0:
         return 0.0
+    # Equal to (price - down) / price up to rounding, with one operation fewer
+    return 1.0 - down_payment / property_price
 
 
 def calculate_down_payment_percentage(property_price: float, down_payment: float) -> float:
@@ -269,12 +321,9 @@ def calculate_down_payment_percentage(property_price: float, down_payment: float
     Returns:
         Down payment as decimal (0.25 = 25%), or 0.0 if calculation fails
     """
-    try:
-        if property_price <= 0:
-            return 0.0
-        return down_payment / property_price
-    except (TypeError, ValueError, ZeroDivisionError):
+    if not (isinstance(property_price, _NUMBER) and isinstance(down_payment, _NUMBER)) or property_price <= 0:
         return 0.0
+    return down_payment / property_price
 
 
 # ============================================================================
@@ -348,40 +397,8 @@ def get_preapproval_details(state: GraphState) -> dict:
         "decision": "Rejected"
     }
     """
-    # Get financial values from state
-    property_price = state.get("property_price", 0)
-    down_payment = state.get("down_payment", 0)
-    
-    # Calculate ratios
-    ltv_ratio = calculate_ltv_ratio(property_price, down_payment)
-    down_payment_pct = calculate_down_payment_percentage(property_price, down_payment)
+    decision, details = _evaluate(state)
     
-    # Calculate loan amount and check requirements
-    try:
-        meets_ltv = ltv_ratio <= 0.75  # Maximum 75% LTV
-        meets_down_payment = down_payment_pct >= 0.25  # Minimum 25% down
-        loan_amount = property_price - down_payment
-    except (TypeError, ValueError):
-        meets_ltv = False
-        meets_down_payment = False  
-        loan_amount = 0
-    
-    # Build comprehensive analysis dictionary
-    return {
-        # ===== Financial Details =====
-        "property_price": property_price or 0,
-        "down_payment": down_payment or 0,
-        "down_payment_percentage": down_payment_pct * 100,  # Convert to percentage
-        "ltv_ratio": ltv_ratio * 100,  # Convert to percentage
-        "loan_amount": loan_amount,
-        
-        # ===== Requirement Checks =====
-        "meets_ltv_requirement": meets_ltv,
-        "meets_down_payment_requirement": meets_down_payment,
-        "has_documentation": state.get("has_valid_passport") and state.get("has_valid_visa"),
-        "has_income_proof": state.get("can_demonstrate_income"),
-        "has_reserves": state.get("has_reserves"),
-        
-        # ===== Final Decision =====
-        "decision": check_preapproval(state)
-    }
\ No newline at end of file
+    # ===== Final Decision =====
+    details["decision"] = decision
+    return details
\ No newline at end of file
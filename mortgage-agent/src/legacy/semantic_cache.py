@@ -0,0 +1,79 @@
+"""
+================================================================================
+SEMANTIC_CACHE.PY - EMBEDDING-SIMILARITY CACHE FOR GENERATED TEXT
+================================================================================
+
+Serves a previously generated response when a new input is a paraphrase of an
+earlier one ("ok" / "sounds good" / "sure"). Entries are grouped in buckets
+(e.g. slot + filled-slots signature) so only comparable contexts are matched;
+within a bucket the lookup is one matrix-vector product over unit embeddings.
+Safe to share across the API's worker threads: every operation holds a lock.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """Per-bucket nearest-neighbour cache over normalized embeddings."""
+
+    def __init__(self, threshold: float = 0.92, max_per_bucket: int = 256):
+        self.threshold = threshold
+        self.max_per_bucket = max_per_bucket
+        self._buckets: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, bucket: str, embedding: Sequence[float]) -> Optional[Any]:
+        """Return the closest cached value if its cosine similarity clears the threshold."""
+        query = self._unit(embedding)
+        with self._lock:
+            entry = self._buckets.get(bucket)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            matrix, values = entry
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return values[best]
+
+    def set(self, bucket: str, embedding: Sequence[float], value: Any) -> None:
+        """Add an entry, dropping the bucket's oldest once it is full."""
+        row = self._unit(embedding)[np.newaxis, :]
+        with self._lock:
+            entry = self._buckets.get(bucket)
+            if entry is None:
+                self._buckets[bucket] = (row, [value])
+                return
+
+            matrix, values = entry
+            matrix = np.vstack((matrix, row))[-self.max_per_bucket:]
+            values = (values + [value])[-self.max_per_bucket:]
+            self._buckets[bucket] = (matrix, values)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "buckets": len(self._buckets),
+                "entries": sum(len(values) for _, values in self._buckets.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -9,17 +9,47 @@ Can be deployed alongside existing API for A/B testing.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-import uuid
+import asyncio
+import logging
+import logging.handlers
+import queue
+import secrets
 import os
 
+from cachetools import TTLCache
+
+from ..conversation_locks import conversation_lock
 from .slot_state import SlotFillingState, create_slot_state
 from .slot_graph import process_slot_turn
 
-# Initialize app
-app = FastAPI(title="Mortgage Pre-Qualification - Slot Filling", version="2.0.0")
+# Request handlers only enqueue log records; a listener thread formats them
+# and writes to the console, keeping that I/O off the request path.
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG if os.getenv("DEBUG_MODE", "false").lower() == "true" else logging.INFO)
+logger.propagate = False
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_console = logging.StreamHandler()
+_log_console.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_console)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+# Initialize app (responses are serialized with orjson)
+app = FastAPI(title="Mortgage Pre-Qualification - Slot Filling", version="2.0.0", default_response_class=ORJSONResponse)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the log listener thread."""
+    _log_listener.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued log records."""
+    _log_listener.stop()
 
 # Static files
 static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
@@ -29,7 +59,14 @@ if os.path.exists(static_path):
 # ============================================================================
 # IN-MEMORY CONVERSATION STORAGE
 # ============================================================================
-conversations: Dict[str, SlotFillingState] = {}
+# Bounded so abandoned conversations don't accumulate: an entry expires
+# CONVERSATION_TTL_SECONDS after its last turn stored it, and the oldest are
+# evicted first once CONVERSATION_MAX_COUNT are held.
+CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+CONVERSATION_MAX_COUNT = int(os.getenv("CONVERSATION_MAX_COUNT", "10000"))
+conversations: "TTLCache[str, SlotFillingState]" = TTLCache(
+    maxsize=CONVERSATION_MAX_COUNT, ttl=CONVERSATION_TTL_SECONDS
+)
 
 # ============================================================================
 # REQUEST/RESPONSE MODELS
@@ -61,55 +98,50 @@ async def chat_endpoint(request: ChatRequest):
     """
     try:
         # Get or create conversation
-        conversation_id = request.conversation_id or str(uuid.uuid4())
-        
-        print(f"\n{'='*80}")
-        print(f"SLOT API REQUEST - Conversation: {conversation_id}")
-        print(f"User Message: {request.message}")
-        print(f"{'='*80}")
+        conversation_id = request.conversation_id or secrets.token_hex(16)
         
-        if conversation_id not in conversations:
-            conversations[conversation_id] = create_slot_state()
-            print(f"Created new slot-filling state")
+        logger.info("chat turn %s: %r", conversation_id, request.message)
         
-        state = conversations[conversation_id]
-        
-        # Add user message
-        state["messages"].append({"role": "user", "content": request.message})
-        
-        # Process turn
-        result = process_slot_turn(state)
-        
-        # Save updated state
-        conversations[conversation_id] = result
-        
-        # Extract response
-        assistant_messages = [msg for msg in result["messages"] if msg["role"] == "assistant"]
-        if assistant_messages:
-            latest_response = assistant_messages[-1]["content"]
-        else:
-            latest_response = "I'm here to help with your mortgage pre-qualification."
-        
-        # Build captured slots summary
-        captured = {}
-        for slot_name, slot_data in result["slots"].items():
-            captured[slot_name] = {
-                "value": slot_data["value"],
-                "confidence": slot_data["confidence"]
+        async with conversation_lock(conversation_id):
+            state = conversations.get(conversation_id)
+            if state is None:
+                state = create_slot_state()
+                logger.debug("created new slot-filling state for %s", conversation_id)
+            
+            # Add user message
+            state["messages"].append({"role": "user", "content": request.message})
+            
+            # Process turn in a worker thread (extraction and question generation
+            # make blocking OpenAI calls that would otherwise stall the event loop)
+            result = await asyncio.to_thread(process_slot_turn, state)
+            
+            # process_slot_turn mutates and returns the state it was given. This is
+            # the turn's only store: it saves a new conversation and restarts an
+            # existing one's expiry clock, so it is not redundant.
+            conversations[conversation_id] = result
+            
+            # Extract response
+            latest_response = next(
+                (msg["content"] for msg in reversed(result["messages"]) if msg["role"] == "assistant"),
+                "I'm here to help with your mortgage pre-qualification."
+            )
+            
+            # Build captured slots summary
+            captured = {
+                slot_name: {"value": slot_data["value"], "confidence": slot_data["confidence"]}
+                for slot_name, slot_data in result["slots"].items()
             }
-        
-        return ChatResponse(
-            response=latest_response,
-            conversation_id=conversation_id,
-            complete=result.get("conversation_complete", False),
-            decision=result.get("final_decision"),
-            captured_slots=captured
-        )
+            
+            return ChatResponse(
+                response=latest_response,
+                conversation_id=conversation_id,
+                complete=result.get("conversation_complete", False),
+                decision=result.get("final_decision"),
+                captured_slots=captured
+            )
         
     except Exception as e:
-        print(f"ERROR in chat_endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("chat turn failed")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 
@@ -120,17 +152,17 @@ async def chat_endpoint(request: ChatRequest):
 @app.get("/conversations/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Get full conversation state for debugging."""
-    if conversation_id not in conversations:
+    state = conversations.get(conversation_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    return conversations[conversation_id]
+    return state
 
 
 @app.delete("/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
-    if conversation_id in conversations:
-        del conversations[conversation_id]
+    if conversations.pop(conversation_id, None) is not None:
         return {"message": "Conversation deleted"}
     else:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -151,6 +151,12 @@ class SlotFillingState(TypedDict):
     
     correction_mode: bool
     """True when user is correcting a specific value."""
+    
+    _ctx_sig: Optional[tuple]
+    """Context-slot values behind _ctx_str (question_generator cache)."""
+    
+    _ctx_str: Optional[str]
+    """Cached "user has provided ..." description for question prompts."""
 
 
 def create_slot_state() -> SlotFillingState:
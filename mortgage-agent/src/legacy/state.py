@@ -34,7 +34,7 @@ USAGE EXAMPLE:
         "current_question": 2          # We're on Q2 (location)
     }
 """
-from typing import TypedDict, List, Optional, Dict
+from typing import TypedDict, List, Optional, Dict, Tuple
 
 
 class GraphState(TypedDict):
@@ -197,6 +197,22 @@ class GraphState(TypedDict):
     - graph.py: Reads to understand user's latest message
     
     CRITICAL: This maintains conversation context across multiple API calls!
+    
+    Bounded to the most recent nodes.MAX_HISTORY_MESSAGES entries; earlier user
+    text survives in _user_text_concat.
+    """
+    
+    _user_text_concat: str
+    """
+    Every user message so far, lowercased and space-joined, appended by
+    nodes.record_user_message. Lets extract_from_full_conversation search the
+    whole conversation without re-joining the history each turn.
+    """
+    
+    _last_user_content: Optional[str]
+    """
+    The most recent user message, set by nodes.record_user_message so the
+    router reads it directly instead of scanning the history.
     """
     
     current_question: Optional[int]
@@ -244,6 +260,12 @@ class GraphState(TypedDict):
     Prevents asking the exact same question twice in a row.
     """
     
+    _known_context_cache: Optional[Tuple[tuple, str]]
+    """
+    (field-values signature, text) of the last "information collected" summary
+    built by nodes.build_known_context. Rebuilt when any collected field changes.
+    """
+    
     conversation_complete: bool
     """
     Has the conversation finished (final decision made)?
@@ -9,26 +9,50 @@ Single endpoint with natural conversation flow.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
-import uuid
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import logging
+import logging.handlers
+import queue
+import re
+import secrets
 import os
 
 from .conversation_simple import process_conversation_turn
+from .conversation_locks import conversation_lock
 from .logging_utils import log_api_error
 from .debug_api import add_debug_endpoints
 from .database import init_database, get_or_create_conversation, save_conversation_safe, delete_conversation, get_or_create_conversation_with_entities, save_conversation_with_entities_safe
 
-# Initialize app
-app = FastAPI(title="Mortgage Pre-Qualification - Simplified", version="3.0.0")
+# Request handlers only enqueue log records; a listener thread formats them
+# and writes to the console, keeping that I/O off the request path.
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG if os.getenv("DEBUG_MODE", "false").lower() == "true" else logging.INFO)
+logger.propagate = False
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_console = logging.StreamHandler()
+_log_console.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_console)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+# Initialize app (responses are serialized with orjson)
+app = FastAPI(title="Mortgage Pre-Qualification - Simplified", version="3.0.0", default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on application startup"""
+    _log_listener.start()
     await init_database()
     print("✅ Database initialized for conversation persistence")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued log records"""
+    _log_listener.stop()
+
 # Add debug endpoints
 add_debug_endpoints(app)
 
@@ -49,6 +73,27 @@ conversations: Dict[str, List[Dict[str, str]]] = {}
 # CONTEXT-AWARE ERROR RECOVERY
 # ============================================================================
 
+# Phrases in the last assistant message that show which field was being asked
+# for, in priority order: the first field with any phrase present wins.
+_FIELD_PHRASES: List[Tuple[str, List[str]]] = [
+    ("down_payment", ["down payment", "put down", "how much can you"]),
+    ("property_price", ["property price", "price you", "cost of"]),
+    ("property_location", ["city", "location", "where is", "property location"]),
+    ("loan_purpose", ["purpose", "property purpose", "use the property"]),
+    ("passport", ["passport", "valid passport"]),
+    ("visa", ["visa", "u.s. visa", "visa status"]),
+    ("income_documentation", ["income", "documentation", "demonstrate income"]),
+    ("reserves", ["reserves", "saved", "payments saved"]),
+]
+_FIELD_RANK = {field: rank for rank, (field, _) in enumerate(_FIELD_PHRASES)}
+
+# One pass over the text: a zero-width match at every position where some
+# phrase starts, tagged with its field's group name.
+_FIELD_RE = re.compile("(?=" + "|".join(
+    f"(?P<{field}>{'|'.join(map(re.escape, phrases))})" for field, phrases in _FIELD_PHRASES
+) + ")")
+
+
 def determine_expected_field(messages: List[Dict[str, str]]) -> str:
     """
     Determine what field the user was likely trying to provide based on conversation context.
@@ -57,31 +102,17 @@ def determine_expected_field(messages: List[Dict[str, str]]) -> str:
         return "unknown"
     
     # Get the last assistant message to understand what was being asked
-    assistant_messages = [m for m in messages if m["role"] == "assistant"]
-    if not assistant_messages:
+    last_assistant_msg = ""
+    for m in reversed(messages):
+        if m["role"] == "assistant":
+            last_assistant_msg = m["content"].lower()
+            break
+    if not last_assistant_msg:
         return "unknown"
     
-    last_assistant_msg = assistant_messages[-1]["content"].lower()
-    
-    # Pattern matching to determine expected field
-    if any(phrase in last_assistant_msg for phrase in ["down payment", "put down", "how much can you"]):
-        return "down_payment"
-    elif any(phrase in last_assistant_msg for phrase in ["property price", "price you", "cost of"]):
-        return "property_price"
-    elif any(phrase in last_assistant_msg for phrase in ["city", "location", "where is", "property location"]):
-        return "property_location"
-    elif any(phrase in last_assistant_msg for phrase in ["purpose", "property purpose", "use the property"]):
-        return "loan_purpose"
-    elif any(phrase in last_assistant_msg for phrase in ["passport", "valid passport"]):
-        return "passport"
-    elif any(phrase in last_assistant_msg for phrase in ["visa", "u.s. visa", "visa status"]):
-        return "visa"
-    elif any(phrase in last_assistant_msg for phrase in ["income", "documentation", "demonstrate income"]):
-        return "income_documentation"
-    elif any(phrase in last_assistant_msg for phrase in ["reserves", "saved", "payments saved"]):
-        return "reserves"
-    else:
-        return "unknown"
+    # Earliest field in _FIELD_PHRASES with a phrase present wins
+    ranks = [_FIELD_RANK[match.lastgroup] for match in _FIELD_RE.finditer(last_assistant_msg)]
+    return _FIELD_PHRASES[min(ranks)][0] if ranks else "unknown"
 
 
 def generate_contextual_error_message(user_input: str, expected_field: str) -> str:
@@ -117,6 +148,10 @@ def generate_contextual_error_message(user_input: str, expected_field: str) -> s
     else:
         return f"I had trouble processing your response '{user_input_clean}'. Could you please rephrase it or provide more details?"
 
+# Phrases in a reply that mean the assessment is finished ("Unfortunately"
+# stays case-sensitive, as it is only matched at the start of a sentence)
+_COMPLETE_RE = re.compile(r"(?i:pre-qualified|don't qualify)|Unfortunately")
+
 # ============================================================================
 # REQUEST/RESPONSE MODELS
 # ============================================================================
@@ -143,83 +178,81 @@ async def chat_endpoint(request: ChatRequest):
     
     Natural conversation flow with coherent responses.
     """
-    try:
-        # Get or create conversation
-        conversation_id = request.conversation_id or str(uuid.uuid4())
-        
-        print(f"\n{'='*80}")
-        print(f"SIMPLE API REQUEST - Conversation: {conversation_id}")
-        print(f"User Message: {request.message}")
-        print(f"{'='*80}")
-        
-        # Load conversation and confirmed entities from database (with fallback to memory)
-        messages, persistent_confirmed_entities = await get_or_create_conversation_with_entities(conversation_id)
-        print(f"Loaded conversation with {len(messages)} existing messages")
-        print(f"Loaded persistent confirmed entities: {persistent_confirmed_entities}")
-        
-        # Add user message
-        messages.append({"role": "user", "content": request.message})
-        
-        # Process turn with simplified system, passing persistent entities
-        response, updated_confirmed_entities = process_conversation_turn(messages, conversation_id, persistent_confirmed_entities)
-        
-        # Add assistant response
-        messages.append({"role": "assistant", "content": response})
-        
-        # Save updated conversation and confirmed entities to database (with fallback to memory)
-        await save_conversation_with_entities_safe(conversation_id, messages, updated_confirmed_entities)
-        print(f"✅ Conversation saved to database (total messages: {len(messages)})")
-        
-        # Check if conversation is complete
-        is_complete = ("pre-qualified" in response.lower() or 
-                      "don't qualify" in response.lower() or
-                      "Unfortunately" in response)
-        
-        print(f"Assistant Response: {response}")
-        print(f"Complete: {is_complete}")
-        
-        return ChatResponse(
-            response=response,
-            conversation_id=conversation_id,
-            complete=is_complete
-        )
-        
-    except Exception as e:
-        # Enhanced error handling with conversation state preservation
-        log_api_error(conversation_id, "/chat", e, conversation_preserved=True)
-        
-        print(f"ERROR in simple chat_endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
-        # CRITICAL: Preserve conversation state even on errors
-        # The user's message was already added to the conversation, so keep it
-        # Add a recovery response instead of crashing the conversation
-        
-        error_type = type(e).__name__
-        
-        # Generate context-aware error message
-        if "openai" in str(e).lower() or "api" in str(e).lower():
-            recovery_response = "I'm experiencing a connection issue. Could you please try again?"
-        elif "function" in str(e).lower() or "tool" in str(e).lower():
-            recovery_response = "I'm having trouble processing that response. Let me continue with the next question."
-        else:
-            # Use contextual error messages for better user experience
-            expected_field = determine_expected_field(messages[:-1])  # Exclude user's current message
-            recovery_response = generate_contextual_error_message(request.message, expected_field)
-        
-        # Add the recovery response to maintain conversation flow
-        messages.append({"role": "assistant", "content": recovery_response})
-        await save_conversation_safe(conversation_id, messages)
-        
-        print(f">>> [RESPONSE_SOURCE] ERROR RECOVERY: {recovery_response}")
-        print(f">>> CONVERSATION PRESERVED: Added recovery response: {recovery_response}")
-        
-        return ChatResponse(
-            response=recovery_response,
-            conversation_id=conversation_id,
-            complete=False
-        )
+    # Get or create conversation
+    conversation_id = request.conversation_id or secrets.token_hex(16)
+    
+    # Turns for one conversation run one at a time: the in-memory fallback
+    # hands every request the same messages list, which the turn mutates in a
+    # worker thread
+    async with conversation_lock(conversation_id):
+        try:
+            logger.info("chat turn %s: %r", conversation_id, request.message)
+            
+            # Load conversation and confirmed entities from database (with fallback to memory)
+            messages, persistent_confirmed_entities = await get_or_create_conversation_with_entities(conversation_id)
+            logger.debug("loaded %d messages, confirmed entities: %s", len(messages), persistent_confirmed_entities)
+            
+            # Add user message
+            messages.append({"role": "user", "content": request.message})
+            
+            # Process turn with simplified system, passing persistent entities.
+            # The turn makes blocking OpenAI calls, so run it in a worker thread
+            # to keep the event loop free for other conversations.
+            response, updated_confirmed_entities = await asyncio.to_thread(
+                process_conversation_turn, messages, conversation_id, persistent_confirmed_entities
+            )
+            
+            # Add assistant response
+            messages.append({"role": "assistant", "content": response})
+            
+            # Save updated conversation and confirmed entities to database (with fallback to memory)
+            await save_conversation_with_entities_safe(conversation_id, messages, updated_confirmed_entities)
+            logger.debug("conversation %s saved (%d messages)", conversation_id, len(messages))
+            
+            # Check if conversation is complete
+            is_complete = _COMPLETE_RE.search(response) is not None
+            
+            logger.debug("assistant response (complete=%s): %s", is_complete, response)
+            
+            return ChatResponse(
+                response=response,
+                conversation_id=conversation_id,
+                complete=is_complete
+            )
+            
+        except Exception as e:
+            # Enhanced error handling with conversation state preservation
+            log_api_error(conversation_id, "/chat", e, conversation_preserved=True)
+            
+            logger.exception("chat turn %s failed", conversation_id)
+            
+            # CRITICAL: Preserve conversation state even on errors
+            # The user's message was already added to the conversation, so keep it
+            # Add a recovery response instead of crashing the conversation
+            
+            error_type = type(e).__name__
+            
+            # Generate context-aware error message
+            if "openai" in str(e).lower() or "api" in str(e).lower():
+                recovery_response = "I'm experiencing a connection issue. Could you please try again?"
+            elif "function" in str(e).lower() or "tool" in str(e).lower():
+                recovery_response = "I'm having trouble processing that response. Let me continue with the next question."
+            else:
+                # Use contextual error messages for better user experience
+                expected_field = determine_expected_field(messages[:-1])  # Exclude user's current message
+                recovery_response = generate_contextual_error_message(request.message, expected_field)
+            
+            # Add the recovery response to maintain conversation flow
+            messages.append({"role": "assistant", "content": recovery_response})
+            await save_conversation_safe(conversation_id, messages)
+            
+            logger.info("chat turn %s recovered with: %s", conversation_id, recovery_response)
+            
+            return ChatResponse(
+                response=recovery_response,
+                conversation_id=conversation_id,
+                complete=False
+            )
 
 
 # ============================================================================
@@ -2,6 +2,7 @@
 Phase 2 testing: Happy path conversation simulation.
 Tests the complete flow with mock user answers.
 """
+import asyncio
 import pytest
 import os
 from unittest.mock import patch, MagicMock
@@ -33,7 +34,11 @@ def create_mock_llm():
         response.content = mock_responses.get(call_count, '{}')
         return response
     
+    async def mock_ainvoke(messages):
+        return mock_invoke(messages)
+    
     mock_llm.invoke = mock_invoke
+    mock_llm.ainvoke = mock_ainvoke
     return mock_llm
 
 
@@ -76,7 +81,7 @@ def test_happy_path_conversation():
         graph = create_mortgage_graph()
         
         # Start conversation
-        state = graph.invoke(initial_state)
+        state = asyncio.run(graph.ainvoke(initial_state))
         
         # Simulate answering each question
         for i, answer in enumerate(user_answers, 1):
@@ -84,7 +89,7 @@ def test_happy_path_conversation():
             state["messages"].append({"role": "user", "content": answer})
             
             # Process through graph  
-            state = graph.invoke(state)
+            state = asyncio.run(graph.ainvoke(state))
             
             # Print progress for debugging
             print(f"After Q{i}: Current question = {state.get('current_question')}")
@@ -0,0 +1,47 @@
+"""
+Unit tests for parsing streamed extraction function-call arguments.
+"""
+import os
+
+# The module builds its OpenAI client at import; no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.legacy.llm_extraction import _parse_streamed_arguments
+
+
+DOWN_PAYMENT_FIELDS = ("down_payment", "property_price")
+
+
+def test_waits_for_every_field_in_the_schema():
+    """A completed first field must not cut off the fields that follow it."""
+    buffer = '{"down_payment": 100000, '
+    assert _parse_streamed_arguments(buffer, DOWN_PAYMENT_FIELDS) is None
+
+    buffer += '"property_price": 400000}'
+    result = _parse_streamed_arguments(buffer, DOWN_PAYMENT_FIELDS)
+    assert result == {"down_payment": 100000, "property_price": 400000}
+
+
+def test_waits_for_number_delimiter():
+    """A number prefix like 5000 is not taken for 50000."""
+    assert _parse_streamed_arguments('{"down_payment": 5000', DOWN_PAYMENT_FIELDS) is None
+
+
+def test_returns_when_object_closes_with_fields_missing():
+    """The model may emit only the fields it found."""
+    result = _parse_streamed_arguments('{"down_payment": 100000}', DOWN_PAYMENT_FIELDS)
+    assert result == {"down_payment": 100000}
+
+
+def test_returns_once_all_fields_are_delimited():
+    """Every schema field emitted and delimited is enough to stop early."""
+    buffer = '{"property_price": 400000, "down_payment": 100000,'
+    result = _parse_streamed_arguments(buffer, DOWN_PAYMENT_FIELDS)
+    assert result == {"property_price": 400000, "down_payment": 100000}
+
+
+def test_ignores_delimiters_inside_strings():
+    """A comma or brace inside a string value is not the end of the value."""
+    fields = ("property_city", "property_state")
+    assert _parse_streamed_arguments('{"property_city": "Miami,', fields) is None
+    assert _parse_streamed_arguments('{"property_city": "Miami}', fields) is None